@@ -0,0 +1,275 @@
+"""Benchmark the MCP client layer over stdio, streamable-http and SSE.
+
+Starts servers/fastmcp/simple_echo.py and servers/servers/simple_resource.py
+locally over every transport client_server.py supports and measures:
+
+- handshake: connect() of a fresh server object (for stdio this includes
+  spawning the process);
+- latency: sequential echo tool calls per payload size (resource reads for
+  simple_resource), through BaseServer.execute_tool;
+- throughput: calls per second with N concurrent callers.
+
+The report is JSON, latencies in milliseconds:
+
+    python -m benchmarks.transport_bench --output transport_report.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from importlib import metadata
+from typing import Any
+
+from client.local_servers.client_server import BaseServer, SseServer, StdioServer, StreamableHttpServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS: dict[str, dict[str, Any]] = {
+    "simple_echo": {"script": "servers/fastmcp/simple_echo.py", "kind": "tool"},
+    "simple_resource": {"script": "servers/servers/simple_resource.py", "kind": "resource"},
+}
+TRANSPORTS = ("stdio", "streamable-http", "sse")
+URL_PATHS = {"streamable-http": "/mcp", "sse": "/sse"}
+RESOURCE_URI = "file:///greeting.txt"
+# FastMCP logs every request at INFO, which would be measured too
+SERVER_ENV = {"FASTMCP_LOG_LEVEL": "WARNING"}
+
+logger = logging.getLogger(__name__)
+
+
+def summarize(samples: list[float]) -> dict[str, Any]:
+    """Count, mean and percentiles of samples given in seconds, reported in ms."""
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def percentile(q: float) -> float:
+        rank = q * (len(ordered) - 1)
+        low = int(rank)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+    return {
+        "n": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+        "min": round(ordered[0] * 1000, 3),
+        "p50": round(percentile(0.5) * 1000, 3),
+        "p95": round(percentile(0.95) * 1000, 3),
+        "p99": round(percentile(0.99) * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_port(port: int, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} before listening")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            await writer.wait_closed()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"Server did not listen on port {port} within {timeout}s")
+
+
+class TransportBenchmark:
+    """Runs the measurements for one server over one transport."""
+
+    def __init__(self, server_name: str, transport: str, args: argparse.Namespace) -> None:
+        self.server_name = server_name
+        self.transport = transport
+        self.args = args
+        self.spec = SERVERS[server_name]
+        self.process: subprocess.Popen | None = None
+        self.config: dict[str, Any] = {
+            # Let the widest concurrency level through the per-server limit
+            "max_concurrency": max(args.concurrency),
+            "tool_timeout": args.timeout,
+        }
+
+    async def start(self) -> None:
+        script = os.path.join(ROOT, self.spec["script"])
+        if self.transport == "stdio":
+            self.config.update(command=sys.executable, args=[script], cwd=ROOT, env=SERVER_ENV)
+            return
+        port = free_port()
+        self.process = subprocess.Popen(
+            [sys.executable, script, "--transport", self.transport, "--port", str(port)],
+            cwd=ROOT,
+            env={**os.environ, **SERVER_ENV},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        await wait_for_port(port, self.process, self.args.timeout)
+        self.config["url"] = f"http://127.0.0.1:{port}{URL_PATHS[self.transport]}"
+
+    def make_server(self) -> BaseServer:
+        if self.transport == "stdio":
+            return StdioServer(self.server_name, self.config)
+        if self.transport == "streamable-http":
+            return StreamableHttpServer(self.server_name, self.config)
+        return SseServer(self.server_name, self.config)
+
+    async def call(self, server: BaseServer, size: int) -> None:
+        if self.spec["kind"] == "tool":
+            result = await server.execute_tool("echo", {"text": "x" * size}, retries=1)
+            if result.isError:
+                raise RuntimeError(f"echo failed: {result.content}")
+        else:
+            await server.session.read_resource(RESOURCE_URI)
+
+    async def run(self) -> dict[str, Any]:
+        report: dict[str, Any] = {"server": self.server_name, "transport": self.transport, "errors": 0}
+        server: BaseServer | None = None
+        try:
+            await self.start()
+            handshakes = []
+            for _ in range(self.args.handshakes):
+                candidate = self.make_server()
+                started = time.perf_counter()
+                await candidate.connect(self.args.timeout)
+                handshakes.append(time.perf_counter() - started)
+                if server is None:
+                    server = candidate
+                else:
+                    await candidate.cleanup()
+            report["handshake_ms"] = summarize(handshakes)
+
+            sizes = self.args.payload_sizes if self.spec["kind"] == "tool" else [0]
+            for _ in range(self.args.warmup):
+                await self.call(server, sizes[0])
+            report["latency_ms"] = {}
+            for size in sizes:
+                report["latency_ms"][str(size)] = summarize(await self.sequential(server, size, report))
+            report["throughput"] = [await self.concurrent(server, c, sizes[0], report) for c in self.args.concurrency]
+        except Exception as e:
+            logger.error(f"{self.server_name} over {self.transport} failed: {e!r}")
+            report["error"] = repr(e)
+        finally:
+            if server is not None:
+                await server.cleanup()
+            if self.process is not None:
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+        return report
+
+    async def sequential(self, server: BaseServer, size: int, report: dict[str, Any]) -> list[float]:
+        samples = []
+        for _ in range(self.args.iterations):
+            started = time.perf_counter()
+            try:
+                await self.call(server, size)
+            except Exception:
+                report["errors"] += 1
+                continue
+            samples.append(time.perf_counter() - started)
+        return samples
+
+    async def concurrent(self, server: BaseServer, concurrency: int, size: int, report: dict[str, Any]) -> dict[str, Any]:
+        total = max(self.args.iterations, concurrency * 10)
+        remaining = total
+        samples: list[float] = []
+
+        async def worker() -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    await self.call(server, size)
+                except Exception:
+                    report["errors"] += 1
+                    continue
+                samples.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        return {
+            "concurrency": concurrency,
+            "calls": len(samples),
+            "seconds": round(elapsed, 4),
+            "calls_per_second": round(len(samples) / elapsed, 2) if elapsed else None,
+            "latency_ms": summarize(samples),
+        }
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark MCP transports with the local example servers.")
+    parser.add_argument("--servers", default=",".join(SERVERS), help="Comma separated servers to run")
+    parser.add_argument("--transports", default=",".join(TRANSPORTS), help="Comma separated transports to run")
+    parser.add_argument("--iterations", type=int, default=200, help="Sequential calls per payload size")
+    parser.add_argument("--warmup", type=int, default=20, help="Calls before measuring")
+    parser.add_argument("--handshakes", type=int, default=5, help="Connections measured per transport")
+    parser.add_argument("--payload-sizes", type=_int_list, default=[16, 1024, 16384, 262144], help="Echo payload sizes in bytes")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16, 64], help="Concurrent callers for throughput")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Startup and per-call timeout in seconds")
+    parser.add_argument("--output", default="-", help="Report path; - prints to stdout")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    try:
+        mcp_version = metadata.version("mcp")
+    except metadata.PackageNotFoundError:
+        mcp_version = None
+    report: dict[str, Any] = {
+        "meta": {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mcp_version": mcp_version,
+            "iterations": args.iterations,
+            "handshakes": args.handshakes,
+            "payload_sizes": args.payload_sizes,
+            "concurrency": args.concurrency,
+        },
+        "results": [],
+    }
+    for server_name in args.servers.split(","):
+        for transport in args.transports.split(","):
+            logger.info(f"Benchmarking {server_name} over {transport}")
+            report["results"].append(await TransportBenchmark(server_name, transport, args).run())
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    # Per-call logs of the client layer would dominate the measurement
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+    logger.setLevel(logging.INFO)
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
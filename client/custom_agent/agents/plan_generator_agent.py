@@ -3,7 +3,6 @@ from typing import Any, List, Dict
 
 from client.local_servers.client_server import BaseServer
 from client.llm_client import BaseLLMClient
-from itertools import chain
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -131,24 +130,14 @@ class PlanGeneratorAgent(BaseAgent):
         await self.initialize_servers()
         
         # Collect all tools from all servers
-        all_tools = []
-        server_count = 1
         logging.info(f"Initializing {len(self.remote_servers) + len(self.agent_servers)} servers...")
-        
-        for server in chain(self.remote_servers, self.agent_servers):
-            logging.debug(f"Collecting tools from server {server_count}...")
-            try:
-                tools = await server.list_tools()
-                all_tools.extend(tools)
-                logging.debug(f"Server {server_count}: Found {len(tools)} tools")
-            except Exception as e:
-                logging.error(f"Failed to collect tools from server {server_count}: {e}")
-            server_count += 1
+        # Named as the routing table resolves them; colliding names are namespaced
+        all_tools = await self.advertised_tools()
         
         logging.info(f"Total tools available: {len(all_tools)}")
         
-        # Build tools schema for OpenAI
-        tools_schema = self._build_tools_schema(all_tools)
+        # Built-in tools go into the prompt and the OpenAI tools schema
+        all_tools = self.with_builtin_tools(all_tools)
         tools_description = "\n".join([tool.format_for_llm() for tool in all_tools])
         tools_description = self._escape_braces_for_format(tools_description)
         
@@ -209,20 +198,15 @@ class PlanGeneratorAgent(BaseAgent):
         await self.initialize_servers()
         
         # Collect all tools from all servers
-        all_tools = []
-        for server in chain(self.remote_servers, self.agent_servers):
-            try:
-                tools = await server.list_tools()
-                all_tools.extend(tools)
-            except Exception as e:
-                logging.error(f"Failed to collect tools from server: {e}")
+        # Named as the routing table resolves them; colliding names are namespaced
+        all_tools = await self.advertised_tools()
 
         if not all_tools:
             print("❌ No tools available. Please check server connections.")
             return
         
-        # Build tools schema for OpenAI
-        tools_schema = self._build_tools_schema(all_tools)
+        # Built-in tools go into the prompt and the OpenAI tools schema
+        all_tools = self.with_builtin_tools(all_tools)
         tools_description = "\n".join([tool.format_for_llm() for tool in all_tools])
         tools_description = self._escape_braces_for_format(tools_description)
         
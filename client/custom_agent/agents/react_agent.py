@@ -3,19 +3,47 @@ import json
 import logging
 from typing import Any, List, Dict
 
-from client.local_servers.client_server import BaseServer, StdioServer
+from client.local_servers.circuit_breaker import CircuitOpenError
+from client.local_servers.client_server import BaseServer, StdioServer, Tool
+from client.local_servers.connection_manager import get_connection_manager
+from client.local_servers.tool_progress import ToolProgress
+from client.custom_agent.tool_results import READ_TOOL_RESULT, ToolResultPager, read_tool_result_tool, serialize_tool_result
 from client.llm_client import BaseLLMClient, LLMClient
+from client.llm_client.metrics import caller_scope
+from client.llm_client.streaming import streaming_enabled
 from client.config.config import Configuration
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
+# Separator of namespaced tool names: <server name>__<tool name>
+TOOL_NAMESPACE_SEPARATOR = "__"
+
+
 class BaseAgent:
     """Base class for agents that interact with LLMs and tool servers."""
     def __init__(self, agent_servers: list[BaseServer], remote_servers: list[BaseServer], llm_client: BaseLLMClient) -> None:
         self.agent_servers = agent_servers
         self.remote_servers = remote_servers
         self.llm_client = llm_client
+        # Stream completions token by token (LLM_STREAM=true); ttft of the last turn in seconds
+        self.stream: bool = streaming_enabled()
+        self.last_ttft: float | None = None
+        # Tool name -> (server, name on that server), rebuilt when any catalog changes
+        self._tool_routes: dict[str, tuple[BaseServer, str]] = {}
+        self._tool_routes_key: tuple | None = None
+        self.tool_collisions: dict[str, list[str]] = {}
+        # Run the tool_calls of one LLM turn concurrently (TOOL_PARALLEL=false restores one-by-one)
+        self.parallel_tools: bool = os.getenv("TOOL_PARALLEL", "true").lower() in ("1", "true", "yes")
+        # Tool results go back to the LLM as compact text capped at TOOL_RESULT_MAX_CHARS
+        self.tool_result_pager = ToolResultPager.from_env()
+        # OpenAI tools schema sent with every completion; set by with_builtin_tools
+        self.tools_schema: List[Dict[str, Any]] = []
+
+    @property
+    def servers(self) -> list[BaseServer]:
+        """All servers of the agent; agent servers win tool name collisions."""
+        return [*self.agent_servers, *self.remote_servers]
     
     def _build_tools_schema(self, tools) -> List[Dict[str, Any]]:
         """Build OpenAI-compatible tools schema."""
@@ -30,21 +58,110 @@ class BaseAgent:
                 }
             })
         return tools_schema
+
+    async def advertised_tools(self) -> List[Tool]:
+        """Server tools as the model sees them, built from the routing table.
+
+        Each name is listed once: a tool exposed by a single server keeps its
+        bare name, one exposed by several servers is listed per server as
+        ``<server>__<tool>`` so the model can pick which one to call.
+        """
+        routes = await self.tool_routes()
+        tools: List[Tool] = []
+        seen: set[str] = set()
+        for server in dict.fromkeys(server for server, _ in routes.values()):
+            try:
+                server_tools = await server.list_tools()
+            except Exception as e:
+                logging.error(f"Failed to list tools of server {server.name}: {e}")
+                continue
+            for tool in server_tools:
+                name = tool.name
+                if name in self.tool_collisions:
+                    name = f"{server.name}{TOOL_NAMESPACE_SEPARATOR}{tool.name}"
+                if name in seen or routes.get(name) != (server, tool.name):
+                    continue
+                seen.add(name)
+                tools.append(Tool(name, tool.description, tool.input_schema, tool.annotations))
+        return tools
+
+    def with_builtin_tools(self, tools: List[Tool]) -> List[Tool]:
+        """Append the agent's built-in tools to the server tools and keep the schema for the LLM."""
+        tools = [*tools, read_tool_result_tool()]
+        self.tools_schema = self._build_tools_schema(tools)
+        return tools
     
+    @staticmethod
+    def _message_to_dict(message: Any) -> Dict[str, Any] | None:
+        """Return an assistant message as a plain dict.
+
+        OpenAIClient hands back the SDK's pydantic objects; they are only
+        dumped here, where the message has to go back into the history.
+        """
+        if message is None or isinstance(message, dict):
+            return message
+        return message.model_dump(exclude_none=True)
+
+    async def tool_routes(self) -> dict[str, tuple[BaseServer, str]]:
+        """Routing table from tool name to (server, tool name on that server).
+
+        Every tool is reachable as ``<server>__<tool>``; the bare name maps to
+        the first server (in ``servers`` order) exposing it, and names exposed
+        by several servers are recorded in ``tool_collisions``. The table is
+        rebuilt only when a server connects, disconnects or reports a changed
+        catalog.
+        """
+        # Lazy servers take part before connecting; their tools come from the manifest
+        servers = [server for server in self.servers if server.session is not None or server.lazy]
+        key = tuple((id(server), server.tools_version) for server in servers)
+        if key == self._tool_routes_key:
+            return self._tool_routes
+
+        routes: dict[str, tuple[BaseServer, str]] = {}
+        namespaced: dict[str, tuple[BaseServer, str]] = {}
+        collisions: dict[str, list[str]] = {}
+        for server in servers:
+            try:
+                tools = await server.list_tools()
+            except Exception as e:
+                logging.error(f"Failed to list tools of server {server.name}: {e}")
+                continue
+            for tool in tools:
+                namespaced[f"{server.name}{TOOL_NAMESPACE_SEPARATOR}{tool.name}"] = (server, tool.name)
+                if tool.name in routes:
+                    collisions.setdefault(tool.name, [routes[tool.name][0].name]).append(server.name)
+                    continue
+                routes[tool.name] = (server, tool.name)
+        for name, owners in collisions.items():
+            logging.warning(
+                f"Tool '{name}' is provided by servers {owners}; using {owners[0]}, "
+                f"address the others as <server>{TOOL_NAMESPACE_SEPARATOR}{name}"
+            )
+
+        self._tool_routes = {**namespaced, **routes}
+        self._tool_routes_key = key
+        self.tool_collisions = collisions
+        return self._tool_routes
+
+    async def resolve_tool(self, tool_name: str) -> tuple[BaseServer, str] | None:
+        """Find the server owning ``tool_name`` (bare or namespaced)."""
+        return (await self.tool_routes()).get(tool_name)
+
     def _escape_braces_for_format(self, text: str) -> str:
         """Escapes literal curly braces in a string for use with .format()."""
         return text.replace('{', '{{').replace('}', '}}')
 
     async def initialize_servers(self) -> None:
-        """Initialize all servers."""
-        for server in self.agent_servers:
-            try:
-                await server.initialize()
-                logging.info(f"Server {server.name} initialized successfully.")
-            except Exception as e:
-                logging.error(f"Failed to initialize server: {e}")
-                await self.cleanup_servers()
-                return
+        """Connect the agent servers that are not already connected.
+
+        Connections are owned by the process-wide ConnectionManager and stay
+        warm between requests, so this is free after the first call.
+        """
+        try:
+            await get_connection_manager().ensure(self.agent_servers)
+        except Exception as e:
+            logging.error(f"Failed to initialize server: {e}")
+            await self.cleanup_servers()
 
     async def process_llm_response(self, llm_response: dict) -> tuple[bool, List[Dict[str, Any]]]:
         """
@@ -63,72 +180,132 @@ class BaseAgent:
         # Extract tool_calls from the OpenAI-style response
         tool_calls = None
         if isinstance(llm_response, dict):
-            message = llm_response.get("message")
-            if message and isinstance(message, dict):
-                tool_calls = message.get("tool_calls")
+            message = self._message_to_dict(llm_response.get("message"))
+        else:
+            message = self._message_to_dict(getattr(llm_response, "message", None))
+        if message:
+            tool_calls = message.get("tool_calls")
 
         if not tool_calls:
             return False, []
 
-        # Execute all tool calls
-        tool_results = []
-        for tool_call in tool_calls:
+        # Calls run in the order the model emitted them. Consecutive independent
+        # calls run concurrently; a tool a server marks as serial is a barrier:
+        # it starts after everything before it finished and runs alone.
+        tool_results: list[Dict[str, Any] | None] = [None] * len(tool_calls)
+        serial = [not self.parallel_tools or await self._is_serial(tool_call) for tool_call in tool_calls]
+
+        async def run(index: int) -> None:
+            tool_results[index] = await self._execute_tool_call(tool_calls[index])
+
+        batch: list[int] = []
+        for index in range(len(tool_calls)):
+            if not serial[index]:
+                batch.append(index)
+                continue
+            await asyncio.gather(*(run(i) for i in batch))
+            batch = []
+            await run(index)
+        await asyncio.gather(*(run(i) for i in batch))
+        return True, tool_results
+
+    async def _is_serial(self, tool_call: Dict[str, Any]) -> bool:
+        route = await self.resolve_tool((tool_call.get("function") or {}).get("name"))
+        return route is not None and route[1] in route[0].serial_tools
+
+    def on_tool_progress(self, update: ToolProgress) -> None:
+        """Called for every progress notification of a running tool; override to show it in a UI."""
+        logging.info(f"Tool progress: {update}")
+
+    async def _execute_tool_call(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one OpenAI-style tool call and format its result message."""
+        try:
+            function = tool_call.get("function", {})
+            tool_name = function.get("name")
+            arguments_str = function.get("arguments", "{}")
+            tool_call_id = tool_call.get("id")
+            
             try:
-                function = tool_call.get("function", {})
-                tool_name = function.get("name")
-                arguments_str = function.get("arguments", "{}")
-                tool_call_id = tool_call.get("id")
-                
-                try:
-                    arguments = json.loads(arguments_str)
-                except Exception:
-                    arguments = arguments_str  # fallback: pass as string if not JSON
+                arguments = json.loads(arguments_str)
+            except Exception:
+                arguments = arguments_str  # fallback: pass as string if not JSON
 
-                logging.info(f"Executing tool: {tool_name}")
-                logging.info(f"With arguments: {arguments}")
-                
-                # Find and execute the tool
-                tool_executed = False
-                for server in self.servers:
-                    tools = await server.list_tools()
-                    if any(tool.name == tool_name for tool in tools):
-                        try:
-                            result = await server.execute_tool(tool_name, arguments)
-                            # Format as OpenAI tool result
-                            tool_results.append({
-                                "role": "tool",
-                                "tool_call_id": tool_call_id,
-                                "content": str(result)
-                            })
-                            tool_executed = True
-                            break
-                        except Exception as e:
-                            error_msg = f"Error executing tool '{tool_name}': {str(e)}"
-                            logging.error(error_msg)
-                            tool_results.append({
-                                "role": "tool",
-                                "tool_call_id": tool_call_id,
-                                "content": f"Error: {error_msg}"
-                            })
-                            tool_executed = True
-                            break
-                
-                if not tool_executed:
-                    tool_results.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call_id,
-                        "content": f"Error: No server found with tool '{tool_name}'"
-                    })
-                    
+            logging.info(f"Executing tool: {tool_name}")
+            logging.info(f"With arguments: {arguments}")
+            
+            if tool_name == READ_TOOL_RESULT and isinstance(arguments, dict):
+                return {
+                    "role": "tool",
+                    "tool_call_id": tool_call_id,
+                    "content": self.tool_result_pager.read(arguments.get("handle", ""), arguments.get("offset", 0))
+                }
+
+            # Find and execute the tool
+            route = await self.resolve_tool(tool_name)
+            if route is None:
+                return {
+                    "role": "tool",
+                    "tool_call_id": tool_call_id,
+                    "content": f"Error: No server found with tool '{tool_name}'"
+                }
+
+            server, server_tool_name = route
+            try:
+                result = await server.execute_tool(server_tool_name, arguments, progress_callback=self.on_tool_progress)
+                # Format as OpenAI tool result
+                return {
+                    "role": "tool",
+                    "tool_call_id": tool_call_id,
+                    "content": self.tool_result_pager.fit(serialize_tool_result(result))
+                }
+            except CircuitOpenError as e:
+                # Fail fast and tell the model not to keep trying this server
+                logging.warning(str(e))
+                return {
+                    "role": "tool",
+                    "tool_call_id": tool_call_id,
+                    "content": f"Error: {e}. Do not call tools of server '{server.name}' again in this task."
+                }
             except Exception as e:
-                logging.error(f"Error processing tool call: {e}")
-                tool_results.append({
+                error_msg = f"Error executing tool '{tool_name}': {str(e)}"
+                logging.error(error_msg)
+                return {
                     "role": "tool",
-                    "tool_call_id": tool_call.get("id", "unknown"),
-                    "content": f"Error: Failed to process tool call - {str(e)}"
-                })
+                    "tool_call_id": tool_call_id,
+                    "content": f"Error: {error_msg}"
+                }
+                
+        except Exception as e:
+            logging.error(f"Error processing tool call: {e}")
+            return {
+                "role": "tool",
+                "tool_call_id": tool_call.get("id", "unknown"),
+                "content": f"Error: Failed to process tool call - {str(e)}"
+            }
 
-        return True, tool_results
+    def _tools_params(self) -> Dict[str, Any]:
+        return {"tools": self.tools_schema} if self.tools_schema else {}
+
+    async def _stream_response(self, messages: List[Dict[str, str]]) -> tuple[str, Dict[str, Any]]:
+        """Stream one completion, printing content as it arrives.
+
+        Returns:
+            (content, choice) in the same shape as a non-streamed response.
+        """
+        llm_stream = await self.llm_client.get_response(messages, stream=True, **self._tools_params())
+        printed = False
+        async for delta in llm_stream:
+            if delta.content:
+                if not printed:
+                    print("Assistant: ", end="", flush=True)
+                    printed = True
+                print(delta.content, end="", flush=True)
+        if printed:
+            print()
+        self.last_ttft = llm_stream.ttft
+        if llm_stream.ttft is not None:
+            logging.info(f"{type(self).__name__} time to first token: {llm_stream.ttft:.3f}s")
+        return llm_stream.content, llm_stream.choice
 
     async def process_one_query(self, messages:List[Dict[str, str]], query: str) -> str:
 
@@ -143,14 +320,21 @@ class BaseAgent:
             iteration += 1
             
             # Get LLM response
-            llm_response_content, llm_response = await self.llm_client.get_response(messages)
+            with caller_scope(type(self).__name__):
+                if self.stream:
+                    llm_response_content, llm_response = await self._stream_response(messages)
+                else:
+                    llm_response_content, llm_response = await self.llm_client.get_response(messages, **self._tools_params())
             
             # Add assistant's response to messages
-            if llm_response.get("message"):
-                messages.append(llm_response["message"])
+            message = self._message_to_dict(
+                llm_response.get("message") if isinstance(llm_response, dict) else getattr(llm_response, "message", None)
+            )
+            if message:
+                messages.append(message)
             
             # Check if the assistant wants to use tools
-            acted, tool_results = await self.process_llm_response(llm_response)
+            acted, tool_results = await self.process_llm_response({"message": message} if message else None)
             
             if acted:
                 # Add all tool results to messages
@@ -162,7 +346,8 @@ class BaseAgent:
                 
             else:
                 # No tools called, this is the final response
-                print(f"Assistant: {llm_response_content}")
+                if not self.stream:
+                    print(f"Assistant: {llm_response_content}")
                 return llm_response_content,acted
 
         
@@ -171,8 +356,11 @@ class BaseAgent:
                     
 
     async def cleanup_servers(self) -> None:
-        """Clean up all servers properly."""
+        """Clean up the servers this agent owns; managed connections stay warm."""
+        manager = get_connection_manager()
         for server in reversed(self.agent_servers):
+            if manager.manages(server):
+                continue
             try:
                 await server.cleanup()
             except Exception as e:
@@ -208,7 +396,10 @@ class ReActAgent(BaseAgent):
     """Implements a ReAct-style agent using LLM and tool servers with proper OpenAI tool calling."""
     
     def __init__(self, servers: list[BaseServer], llm_client: BaseLLMClient) -> None:
-        super().__init__(servers, llm_client)
+        super().__init__(servers, [], llm_client)
+        # mcpServers entries are independent: one that is down must not stop the others
+        for server in servers:
+            server.config.setdefault("optional", True)
 
     def _build_tools_schema(self, tools) -> List[Dict[str, Any]]:
         """Build OpenAI-compatible tools schema."""
@@ -224,27 +415,15 @@ class ReActAgent(BaseAgent):
             })
         return tools_schema
 
-    async def initialize_servers(self) -> None:
-        """Initialize all servers."""
-        for server in self.servers:
-            try:
-                await server.initialize()
-            except Exception as e:
-                logging.error(f"Failed to initialize server: {e}")
-                await self.cleanup_servers()
-                return
-
-
     async def start(self) -> None:
+        # Servers start concurrently with a deadline each (BaseAgent.initialize_servers)
+        await self.initialize_servers()
 
-        # Collect all tools from all servers
-        all_tools = []
-        for server in self.servers:
-            tools = await server.list_tools()
-            all_tools.extend(tools)
+        # Tools of the servers that came up, named as the routing table resolves them
+        all_tools = await self.advertised_tools()
         
-        # Build tools schema for OpenAI
-        tools_schema = self._build_tools_schema(all_tools)
+        # Built-in tools go into the prompt and the OpenAI tools schema
+        all_tools = self.with_builtin_tools(all_tools)
         tools_description = "\n".join([tool.format_for_llm() for tool in all_tools])
 
         system_prompt = REACT_PROMPT.format(tools_description=tools_description)
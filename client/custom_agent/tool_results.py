@@ -0,0 +1,135 @@
+import json
+import os
+from collections import OrderedDict
+from typing import Any
+
+from mcp import types
+
+from client.local_servers.client_server import Tool
+
+# Built-in tool the model calls to page through truncated results
+READ_TOOL_RESULT = "read_tool_result"
+
+
+def read_tool_result_tool() -> Tool:
+    """Definition of the built-in READ_TOOL_RESULT tool, advertised next to the server tools."""
+    return Tool(
+        READ_TOOL_RESULT,
+        "Read the next page of a tool result that was truncated. Use the handle and offset given in the truncation note.",
+        {
+            "type": "object",
+            "properties": {
+                "handle": {"type": "string", "description": "Handle of the truncated result, e.g. r1"},
+                "offset": {"type": "integer", "description": "Character offset to continue from"},
+            },
+            "required": ["handle", "offset"],
+        },
+    )
+
+
+def tool_result_value(result: Any) -> Any:
+    """Extract the payload of a tool result as plain JSON-able data.
+
+    Structured content wins when the server provides it. Otherwise text
+    parts are parsed as JSON where possible, binary parts are replaced by a
+    short placeholder and a single part is unwrapped. Annotations and meta
+    are dropped. Error results become ``{"error": ...}``.
+    """
+    if not isinstance(result, types.CallToolResult):
+        return result
+    structured = getattr(result, "structuredContent", None)
+    if structured is not None:
+        value = structured
+    else:
+        parts = [_content_value(part) for part in result.content]
+        value = parts[0] if len(parts) == 1 else parts
+    return {"error": value} if result.isError else value
+
+
+def _content_value(part: Any) -> Any:
+    if isinstance(part, types.TextContent):
+        return _parse_json(part.text)
+    if isinstance(getattr(part, "data", None), str):
+        # Base64 image/audio data is useless to the model; say what it was
+        return {"type": part.type, "mimeType": part.mimeType, "size": len(part.data)}
+    if isinstance(part, types.EmbeddedResource):
+        resource = part.resource
+        if isinstance(resource, types.TextResourceContents):
+            return {"uri": str(resource.uri), "text": _parse_json(resource.text)}
+        return {"uri": str(resource.uri), "mimeType": resource.mimeType, "size": len(resource.blob)}
+    return part.model_dump(exclude_none=True) if hasattr(part, "model_dump") else part
+
+
+def _parse_json(text: str) -> Any:
+    stripped = text.strip()
+    if stripped[:1] in ("{", "[", '"'):
+        try:
+            return json.loads(stripped)
+        except ValueError:
+            pass
+    return text
+
+
+def serialize_tool_result(result: Any) -> str:
+    """Render a tool result for a ``tool`` message: bare text or minified JSON."""
+    value = tool_result_value(result)
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class ToolResultPager:
+    """Caps tool results fed back to the LLM and pages through the rest.
+
+    A result longer than ``max_chars`` is cut to its first ``max_chars``
+    characters and kept under a handle; the note appended to the cut text
+    tells the model how to call ``read_tool_result`` for the next page.
+    Only the ``max_entries`` most recent results stay readable.
+    """
+
+    def __init__(self, max_chars: int = 4000, max_entries: int = 32) -> None:
+        self.max_chars = max_chars
+        self.max_entries = max_entries
+        self._results: OrderedDict[str, str] = OrderedDict()
+        self._next_handle = 0
+
+    @classmethod
+    def from_env(cls) -> "ToolResultPager":
+        """Build a pager from TOOL_RESULT_MAX_CHARS / TOOL_RESULT_MAX_ENTRIES."""
+        return cls(
+            max_chars=int(os.getenv("TOOL_RESULT_MAX_CHARS", 4000)),
+            max_entries=int(os.getenv("TOOL_RESULT_MAX_ENTRIES", 32)),
+        )
+
+    def fit(self, text: str) -> str:
+        """Return ``text``, or its first page plus a paging note if it is too long."""
+        if self.max_chars <= 0 or len(text) <= self.max_chars:
+            return text
+        self._next_handle += 1
+        handle = f"r{self._next_handle}"
+        self._results[handle] = text
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return self._page(handle, text, 0)
+
+    def read(self, handle: str, offset: int = 0) -> str:
+        """Return the page of a stored result starting at ``offset``."""
+        text = self._results.get(handle)
+        if text is None:
+            return f"Error: no stored tool result '{handle}' (results expire after {self.max_entries} newer ones)"
+        self._results.move_to_end(handle)
+        offset = max(0, int(offset))
+        if offset >= len(text):
+            return f"Error: offset {offset} is past the end of result '{handle}' ({len(text)} chars)"
+        return self._page(handle, text, offset)
+
+    def _page(self, handle: str, text: str, offset: int) -> str:
+        end = offset + self.max_chars
+        page = text[offset:end]
+        if end >= len(text):
+            return page
+        args = json.dumps({"handle": handle, "offset": end})
+        return (
+            f"{page}\n[truncated: chars {offset}-{end} of {len(text)} shown; "
+            f"call {READ_TOOL_RESULT} with {args} for more]"
+        )
@@ -3,13 +3,20 @@ import logging
 import os
 import json
 from client.config.config import Configuration
-from client.local_servers.client_server import StdioServer,StreamableHttpServer,SseServer
-from client.llm_client import OpenAIClient, LLMClient
+from client.local_servers.client_server import StdioServer,StreamableHttpServer,PooledStreamableHttpServer,SseServer
+from client.local_servers.connection_manager import get_connection_manager
+from client.local_servers.stdio_pool import WarmStdioServer, get_stdio_pool
+from client.llm_client import BaseLLMClient, CachedLLMClient, CassetteLLMClient, CoalescingLLMClient, LLMResponseCache, OpenAIClient, LLMClient, RouterLLMClient, close_http_client
+from client.llm_client.metrics import caller_scope, llm_metrics
+from client.llm_client.streaming import JsonFieldStreamer, streaming_enabled
 from client.local_servers.client_server import BaseServer
 from client.custom_agent.agents.react_agent import BaseAgent
+from client.custom_agent.tool_results import tool_result_value
 from client.custom_agent.agents.plan_generator_agent import PlanGeneratorAgent
 from client.custom_agent.agents.plan_executor_agent import PlanExecutorAgent
+from client.intent_classifier import Intent, IntentClassifier
 import re
+from typing import Any
 
 
 # Configure logging
@@ -60,15 +67,23 @@ Do not wrap the response in Markdown code blocks (```json ... ```) or any other
 class ChatSession:
     """Orchestrates the interaction between user, LLM, and tools."""
 
-    def __init__(self, servers: list[BaseServer], plan_generator: BaseAgent, plan_executor: BaseAgent,initialize:bool=True) -> None:
+    def __init__(self, servers: list[BaseServer], plan_generator: BaseAgent, plan_executor: BaseAgent,initialize:bool=True, cheap_llm: BaseLLMClient | None = None) -> None:
         self.servers: list[BaseServer] = servers
         self.plan_generator: BaseAgent = plan_generator
         self.plan_executor: BaseAgent = plan_executor
         self.tools: dict = {"plan_generator": self.plan_generator, "plan_executor": self.plan_executor}
-        self.cheap_llm= OpenAIClient(api_key=os.getenv("GEMINI_API_KEY", ""),
+        self.cheap_llm= cheap_llm or OpenAIClient(api_key=os.getenv("GEMINI_API_KEY", ""),
                                      model_id=os.getenv("MODEL_ID", "gpt-3.5-turbo"))
 
         self.initialized = initialize
+        # 明确的指令（运行/创建计划、列出计划、查询状态）直接本地识别，跳过一次LLM路由调用
+        self.intent_classifier: IntentClassifier | None = (
+            IntentClassifier(float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", 0.8)))
+            if os.getenv("INTENT_FAST_PATH", "true").lower() in ("1", "true", "yes") else None
+        )
+        # Stream the routing reply so direct answers show up token by token
+        self.stream: bool = streaming_enabled()
+        self.last_ttft: float | None = None
 
     async def cleanup_servers(self) -> None:
         """Clean up all servers properly."""
@@ -105,6 +120,72 @@ class ChatSession:
             ) from e
 
 
+    async def _stream_routing_response(self, messages: list[dict[str, str]]) -> str:
+        """Stream the routing reply, printing its `content` field as it arrives.
+
+        Returns:
+            The full raw reply text.
+        """
+        llm_stream = await self.cheap_llm.get_response(messages, stream=True)
+        content_streamer = JsonFieldStreamer("content")
+        printed = False
+        async for delta in llm_stream:
+            text = content_streamer.feed(delta.content)
+            if text:
+                if not printed:
+                    print("Assistant: ", end="", flush=True)
+                    printed = True
+                print(text, end="", flush=True)
+        if printed:
+            print()
+        self.last_ttft = llm_stream.ttft
+        if llm_stream.ttft is not None:
+            logging.info(f"ChatSession time to first token: {llm_stream.ttft:.3f}s")
+        return llm_stream.content
+
+    async def _call_agent_tool(self, agent: BaseAgent, tool_name: str) -> Any:
+        """Call a no-argument tool on one of the agent's local servers."""
+        for server in agent.agent_servers:
+            await get_connection_manager().ensure([server])
+            tools = await server.list_tools()
+            if any(tool.name == tool_name for tool in tools):
+                return await server.execute_tool(tool_name, {})
+        raise RuntimeError(f"No agent server provides tool '{tool_name}'")
+
+    async def _handle_intent(self, intent: Intent, user_input: str, messages: list[dict[str, str]]) -> None:
+        """Act on a locally classified intent without the routing LLM call."""
+        logging.info(f"Intent fast path: {intent.name} ({intent.confidence:.2f}) {intent.params}")
+        if intent.name == "create_plan":
+            # The planner gets what the plan is for, as the routing LLM would pass it
+            topic = intent.params.get("topic", user_input)
+            reply = {"content": topic, "tool_calls": {"use_agent": True, "content": topic}}
+            messages.append({"role": "assistant", "content": json.dumps(reply)})
+            logging.info("\n using plan_generator to generate a plan")
+            await self.plan_generator.plan_generate(topic)
+            logging.info("\n using plan_executor to execute the plan")
+            await self.plan_executor.execute_plan(topic)
+            return
+        if intent.name == "run_plan":
+            plan_id = intent.params.get("plan_id")
+            task = f"Execute plan {plan_id}" if plan_id else "Execute the latest plan automatically"
+            reply = {"content": task, "tool_calls": {"use_agent": True, "plan_id": plan_id}}
+            messages.append({"role": "assistant", "content": json.dumps(reply)})
+            logging.info("\n using plan_executor to execute the plan")
+            await self.plan_executor.execute_plan(task)
+            return
+
+        if intent.name == "list_plans":
+            result = {"plans": await self._call_agent_tool(self.plan_generator, "list_all_plans")}
+        else:
+            result = {
+                "pipeline": await self._call_agent_tool(self.plan_generator, "get_pipeline_status"),
+                "execution": await self._call_agent_tool(self.plan_executor, "get_execution_status"),
+            }
+        result = {key: tool_result_value(value) for key, value in result.items()}
+        print(f"Assistant: {json.dumps(result, ensure_ascii=False, indent=2, default=str)}")
+        content = json.dumps(result, ensure_ascii=False, separators=(",", ":"), default=str)
+        messages.append({"role": "assistant", "content": json.dumps({"content": content, "tool_calls": None}, ensure_ascii=False)})
+
     async def start(self) -> None:
         """Main chat session handler."""
         if not self.initialized:
@@ -127,7 +208,21 @@ class ChatSession:
                         break
 
                     messages.append({"role": "user", "content": user_input})
-                    response_content, raw_response = await self.cheap_llm.get_response(messages)
+                    intent = self.intent_classifier.classify(user_input) if self.intent_classifier else None
+                    if intent is not None:
+                        history_length = len(messages)
+                        try:
+                            await self._handle_intent(intent, user_input, messages)
+                            continue
+                        except Exception as e:
+                            # Server down, slow or circuit-open: let the LLM routing path handle it
+                            logging.warning(f"Intent fast path {intent.name} failed, routing through the LLM: {e}")
+                            del messages[history_length:]
+                    with caller_scope("ChatSession"):
+                        if self.stream:
+                            response_content = await self._stream_routing_response(messages)
+                        else:
+                            response_content, raw_response = await self.cheap_llm.get_response(messages)
                     logging.debug(f"Assistant: {response_content}")
                     response_content= await self.parse_json_response(response_content)
                     tool_calls= response_content.get("tool_calls",None)
@@ -138,7 +233,8 @@ class ChatSession:
                         logging.info("\n using plan_executor to execute the plan")
                         await self.plan_executor.execute_plan(tool_calls["content"])
                     else:
-                        print(f"Assistant: {response_content['content']}")
+                        if not self.stream:
+                            print(f"Assistant: {response_content['content']}")
                         messages.append({"role": "assistant", "content": json.dumps(response_content)})
                         continue
 
@@ -149,15 +245,14 @@ class ChatSession:
         finally:
             await self.cleanup_servers()
 
-async def initialize_servers(servers: list[BaseServer]) -> None:
-    """Initialize all servers in the session."""
-    for server in servers:
-        try:
-            await server.initialize()
-        except Exception as e:
-            logging.error(f"Failed to initialize server {server.name}: {e}")
-            await server.cleanup()
-            raise e
+async def initialize_servers(servers: list[BaseServer]) -> list[BaseServer]:
+    """Initialize all servers in the session concurrently and keep them warm.
+
+    Returns:
+        The servers that came up; optional servers that failed are dropped.
+    """
+    results = await get_connection_manager().ensure(servers)
+    return [server for server, result in zip(servers, results) if result.status in ("ok", "connected", "deferred")]
 
 async def main() -> None:
     """Initialize and run the chat session."""
@@ -173,9 +268,15 @@ async def main() -> None:
     # ]
     servers=[]
     for name, srv_config in server_config["RemoteServers"].items():
-        if srv_config["type"] == "stdio":
+        if srv_config["type"] == "stdio" and get_stdio_pool().warm_size(srv_config) > 0:
+            # 从预热的进程池中取已初始化的会话，避免uvx/npx冷启动
+            servers.append(WarmStdioServer(name, srv_config))
+        elif srv_config["type"] == "stdio":
             logging.debug(f"Initializing StdioServer: {name} with config: {srv_config}")
             servers.append(StdioServer(name, srv_config))
+        elif srv_config["type"] == "streamable-http" and srv_config.get("pool_size", 1) > 1:
+            # 多个会话并行调用同一个HTTP服务器，避免队头阻塞
+            servers.append(PooledStreamableHttpServer(name, srv_config))
         elif srv_config["type"] == "streamable-http":
             servers.append(StreamableHttpServer(name, srv_config))
         elif srv_config["type"] == "sse":
@@ -193,8 +294,12 @@ async def main() -> None:
     local_server_client={"plan_executor_server": None, "plan_generator_server": None}
     for name, srv_config in server_config["LocalServers"].items():
 
-        if srv_config["type"] == "stdio":
+        if srv_config["type"] == "stdio" and get_stdio_pool().warm_size(srv_config) > 0:
+            local_server_client[name]=WarmStdioServer(name, srv_config)
+        elif srv_config["type"] == "stdio":
             local_server_client[name]=StdioServer(name, srv_config)
+        elif srv_config["type"] == "streamable-http" and srv_config.get("pool_size", 1) > 1:
+            local_server_client[name]=PooledStreamableHttpServer(name, srv_config)
         elif srv_config["type"] == "streamable-http":
             local_server_client[name]=StreamableHttpServer(name, srv_config)
         elif srv_config["type"] == "sse":
@@ -202,24 +307,39 @@ async def main() -> None:
         else:
             logging.error(f"Unsupported server type: {srv_config['type']}")
 
-    await initialize_servers(servers)
+    servers = await initialize_servers(servers)
     logging.info("All remote servers initialized successfully.")
 
-    # 构造agent
+    # 构造agent，所有agent共用同一个llm client（同一个连接池）
+    if os.getenv("LLM_ENDPOINTS_CONFIG_PATH"):
+        # 在多个endpoint之间按延迟路由，可选对冲请求
+        llm_client = RouterLLMClient.from_config(config.load_config(os.getenv("LLM_ENDPOINTS_CONFIG_PATH")))
+    else:
+        llm_client = OpenAIClient(
+            api_key=os.getenv("GEMINI_API_KEY", ""),
+            model_id=os.getenv("MODEL_ID", "gpt-3.5-turbo")
+        )
+    if os.getenv("LLM_CASSETTE_PATH"):
+        # 录制真实的LLM交互，或离线回放用于基准测试编排层本身的开销
+        if os.getenv("LLM_CASSETTE_MODE", "replay") == "record":
+            llm_client = CassetteLLMClient.from_env(inner=llm_client)
+        else:
+            llm_client = CassetteLLMClient.from_env()
+    if os.getenv("LLM_CACHE", "false").lower() in ("1", "true", "yes"):
+        # 路由提示词和plan的系统提示词在用户之间大量重复，命中缓存可以直接跳过网络请求
+        llm_client = CachedLLMClient(llm_client, LLMResponseCache.from_env())
+    llm_cache = llm_client if isinstance(llm_client, CachedLLMClient) else None
+    if os.getenv("LLM_COALESCE", "true").lower() in ("1", "true", "yes"):
+        # 多个会话同时发出相同的请求时只调用一次上游
+        llm_client = CoalescingLLMClient(llm_client)
     plan_generator = PlanGeneratorAgent(
         agent_servers=[local_server_client["plan_generator_server"]],
         remote_servers=servers,
-       llm_client=OpenAIClient(
-            api_key=os.getenv("GEMINI_API_KEY", ""),
-            model_id=os.getenv("MODEL_ID", "gpt-3.5-turbo")
-        ))
+       llm_client=llm_client)
     plan_executor = PlanExecutorAgent(
         agent_servers=[local_server_client["plan_executor_server"]],
         remote_servers=servers,
-        llm_client=OpenAIClient(
-            api_key=os.getenv("GEMINI_API_KEY", ""),
-            model_id=os.getenv("MODEL_ID", "gpt-3.5-turbo")
-        )
+        llm_client=llm_client
     )
 
 
@@ -227,11 +347,25 @@ async def main() -> None:
         servers=servers,
         plan_generator=plan_generator,
         plan_executor=plan_executor,
-        initialize=True
+        initialize=True,
+        cheap_llm=llm_client
     )
     
 
-    await chat_session.start()
+    try:
+        await chat_session.start()
+    finally:
+        if llm_cache is not None:
+            logging.info(f"LLM cache stats: {llm_cache.cache.stats()}")
+        if os.getenv("LLM_METRICS_PATH"):
+            # 退出时导出Prometheus文本格式的LLM调用指标
+            with open(os.getenv("LLM_METRICS_PATH"), "w", encoding="utf-8") as f:
+                f.write(llm_metrics.to_prometheus())
+        logging.info(f"LLM call metrics: {json.dumps(llm_metrics.snapshot(), default=str)}")
+        await llm_client.aclose()
+        await close_http_client()
+        await get_connection_manager().aclose()
+        await get_stdio_pool().aclose()
 
 
 if __name__ == "__main__":
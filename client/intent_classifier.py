@@ -0,0 +1,102 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+# Polite prefixes that do not change what the user is asking for
+_PREFIX = r"^(?:(?:please|pls|ok(?:ay)?|now|then|can you|could you)[\s,]+)*"
+_END = r"\s*[.!]*\s*$"
+# Free text of a single request: no sentence breaks and no chained follow-up clause
+_CLAUSE = r"(?:(?!\b(?:then|also|afterwards|after\s+that|and\s+(?:then|run|execute|start|show|list))\b)[^.!?;\n])"
+
+
+@dataclass
+class Intent:
+    """A locally recognised user intent.
+
+    Attributes:
+        name: One of "create_plan", "run_plan", "list_plans" or "status".
+        confidence: Score in [0, 1]; the session only acts on it above its threshold.
+        params: Values captured from the input (``topic``, ``plan_id``).
+    """
+
+    name: str
+    confidence: float
+    params: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _Rule:
+    name: str
+    pattern: re.Pattern[str]
+    confidence: float
+
+
+class IntentClassifier:
+    """Keyword/regex matcher for unambiguous routing commands.
+
+    Rules are anchored at both ends so only short imperative commands match;
+    anything with extra clauses, questions or negations is left to the LLM.
+    When rules for different intents match the same input the result is
+    ambiguous and ``classify`` returns None.
+    """
+
+    RULES: list[_Rule] = [
+        _Rule(
+            "run_plan",
+            re.compile(_PREFIX + r"(?:run|execute|start)\s+(?:the\s+)?plan\s+(?:id\s+)?#?(?P<plan_id>[\w-]*\d[\w-]*)" + _END, re.I),
+            0.95,
+        ),
+        _Rule(
+            "run_plan",
+            re.compile(_PREFIX + r"(?:run|execute|start)\s+(?:the\s+)?(?:latest|last|current|active)\s+plan" + _END, re.I),
+            0.9,
+        ),
+        _Rule(
+            "create_plan",
+            re.compile(
+                _PREFIX + r"(?:create|make|generate|draft|write|build)\s+(?:me\s+)?(?:a|an|the)?\s*(?:new\s+)?plan\s+"
+                r"(?:for|to|about|on)\s+(?P<topic>\S" + _CLAUSE + r"*?)" + _END,
+                re.I,
+            ),
+            0.9,
+        ),
+        _Rule(
+            "list_plans",
+            re.compile(_PREFIX + r"(?:list|show|display)(?:\s+(?:me|all|the|my|saved))*\s+plans" + _END, re.I),
+            0.95,
+        ),
+        _Rule(
+            "status",
+            re.compile(
+                _PREFIX + r"(?:(?:show|get|check)\s+(?:me\s+)?(?:the\s+)?)?(?:pipeline\s+|execution\s+|plan\s+)?status" + _END,
+                re.I,
+            ),
+            0.95,
+        ),
+    ]
+
+    # Words that make an otherwise matching command doubtful
+    _HEDGES = re.compile(r"\b(?:not|don'?t|never|maybe|how|why|what|should|whether)\b", re.I)
+
+    def __init__(self, threshold: float = 0.8) -> None:
+        self.threshold = threshold
+
+    def classify(self, text: str) -> Intent | None:
+        """Return the intent for ``text`` if it is confidently recognised, else None."""
+        text = text.strip()
+        if not text or "\n" in text:
+            return None
+        matches: list[Intent] = []
+        for rule in self.RULES:
+            match = rule.pattern.match(text)
+            if match is None:
+                continue
+            confidence = rule.confidence
+            if self._HEDGES.search(text):
+                confidence -= 0.3
+            params = {key: value for key, value in match.groupdict().items() if value}
+            matches.append(Intent(rule.name, confidence, params))
+        if not matches or len({intent.name for intent in matches}) > 1:
+            return None
+        best = max(matches, key=lambda intent: intent.confidence)
+        return best if best.confidence >= self.threshold else None
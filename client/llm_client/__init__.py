@@ -0,0 +1,40 @@
+from client.llm_client.llm_client import (
+    BaseLLMClient,
+    DelegatingLLMClient,
+    LLMClient,
+    LLMResponseError,
+    OpenAIClient,
+    close_http_client,
+    get_http_client,
+    get_llm_semaphore,
+    get_openai_client,
+)
+from client.llm_client.streaming import LLMStream, StreamDelta
+from client.llm_client.cache import CachedLLMClient, LLMResponseCache
+from client.llm_client.cassette import CassetteLLMClient, CassetteMissError
+from client.llm_client.coalesce import CoalescingLLMClient
+from client.llm_client.router import RouterLLMClient
+from client.llm_client.metrics import LLMMetrics, caller_scope, llm_metrics
+
+__all__ = [
+    "BaseLLMClient",
+    "CachedLLMClient",
+    "CassetteLLMClient",
+    "CassetteMissError",
+    "CoalescingLLMClient",
+    "DelegatingLLMClient",
+    "LLMClient",
+    "LLMMetrics",
+    "LLMResponseCache",
+    "LLMResponseError",
+    "LLMStream",
+    "OpenAIClient",
+    "RouterLLMClient",
+    "StreamDelta",
+    "caller_scope",
+    "close_http_client",
+    "get_http_client",
+    "get_llm_semaphore",
+    "get_openai_client",
+    "llm_metrics",
+]
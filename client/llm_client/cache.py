@@ -0,0 +1,264 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Tuple
+
+from client.llm_client.llm_client import BaseLLMClient, DelegatingLLMClient
+from client.llm_client.streaming import LLMStream
+
+
+def _to_jsonable(value: Any) -> Any:
+    """json.dumps fallback for pydantic objects in messages or responses."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_none=True)
+    return str(value)
+
+
+def make_cache_key(messages: list[dict[str, Any]], model_id: str | None, params: dict[str, Any]) -> str:
+    """Build a canonical hash for one chat completion request.
+
+    Messages, model id and every request parameter (temperature, max_tokens,
+    tools schema, ...) are serialized with sorted keys and no whitespace, so
+    equal requests hash equally regardless of dict ordering.
+
+    Returns:
+        A hex sha256 digest.
+    """
+    canonical = json.dumps(
+        {"messages": messages, "model": model_id, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=_to_jsonable,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class MemoryLRUCache:
+    """In-memory LRU tier with per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float | None = 3600) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if self.ttl is not None and time.time() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk tier backed by SQLite with TTL eviction and an entry cap.
+
+    Entries are evicted least-recently-used first once ``max_entries`` is
+    exceeded. Calls are synchronous; LLMResponseCache runs them in a worker
+    thread so the event loop is never blocked on disk I/O.
+    """
+
+    def __init__(self, path: str, ttl: float | None = 7 * 24 * 3600, max_entries: int = 100_000) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache(accessed_at)")
+        self._conn.commit()
+        self.evict_expired()
+
+    def get(self, key: str) -> Any | None:
+        row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        now = time.time()
+        if self.ttl is not None and now - created_at > self.ttl:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False, default=_to_jsonable), now, now),
+        )
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+        self._conn.commit()
+
+    def evict_expired(self) -> None:
+        if self.ttl is None:
+            return
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+        self._conn.commit()
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM llm_cache")
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class LLMResponseCache:
+    """Two-tier LLM response cache: in-memory LRU in front of optional SQLite.
+
+    Values are ``{"content": ..., "choice": {...}}`` with the choice stored as
+    a plain dict. Disk hits are promoted into the memory tier.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float | None = 3600,
+        sqlite_path: str | None = None,
+        sqlite_ttl: float | None = 7 * 24 * 3600,
+        sqlite_max_entries: int = 100_000,
+    ) -> None:
+        self.memory = MemoryLRUCache(max_entries=max_entries, ttl=ttl)
+        self.disk = SQLiteCache(sqlite_path, ttl=sqlite_ttl, max_entries=sqlite_max_entries) if sqlite_path else None
+        # Only one thread touches the SQLite connection at a time
+        self._disk_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache":
+        """Build a cache from LLM_CACHE_* environment variables."""
+        return cls(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1024)),
+            ttl=float(os.getenv("LLM_CACHE_TTL", 3600)),
+            sqlite_path=os.getenv("LLM_CACHE_PATH") or None,
+            sqlite_ttl=float(os.getenv("LLM_CACHE_DISK_TTL", 7 * 24 * 3600)),
+            sqlite_max_entries=int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", 100_000)),
+        )
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            async with self._disk_lock:
+                value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.memory.set(key, value)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: dict[str, Any]) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            async with self._disk_lock:
+                await asyncio.to_thread(self.disk.set, key, value)
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters and tier sizes."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+        }
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+
+class CachedLLMClient(DelegatingLLMClient):
+    """Serves repeated requests from an LLMResponseCache before calling the wrapped client.
+
+    Streamed calls are answered from the cache as a single-chunk LLMStream; on
+    a miss the live stream is passed through and stored once fully consumed.
+    Error replies (no choice) are never cached.
+    """
+
+    def __init__(self, inner: BaseLLMClient, cache: LLMResponseCache | None = None) -> None:
+        super().__init__(inner)
+        self.cache = cache or LLMResponseCache.from_env()
+
+    def cache_key(self, messages: list[dict[str, Any]], **kwargs: Any) -> str:
+        return make_cache_key(messages, self.model_id, {**self.request_params, **kwargs})
+
+    async def get_response(self, messages: list[dict[str, str]], stream: bool = False, **kwargs: Any) -> Tuple[str, Any] | LLMStream:
+        key = self.cache_key(messages, **kwargs)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            logging.debug(f"LLM cache hit {key[:12]}")
+            # Callers append the message to their history; keep the cached copy pristine
+            cached = copy.deepcopy(cached)
+            if stream:
+                return LLMStream.from_response(cached["content"], cached["choice"])
+            return cached["content"], cached["choice"]
+
+        if stream:
+            llm_stream = await self.inner.get_response(messages, stream=True, **kwargs)
+            llm_stream.add_done_callback(
+                lambda done: asyncio.ensure_future(self._store(key, done.content, done.choice))
+            )
+            return llm_stream
+
+        content, choice = await self.inner.get_response(messages, **kwargs)
+        await self._store(key, content, choice)
+        return content, choice
+
+    async def _store(self, key: str, content: str | None, choice: Any) -> None:
+        if not choice:
+            return
+        if not isinstance(choice, dict):
+            choice = choice.model_dump(exclude_none=True)
+        try:
+            await self.cache.set(key, {"content": content, "choice": choice})
+        except Exception as e:
+            logging.warning(f"Failed to store LLM response in cache: {e}")
+
+    async def aclose(self) -> None:
+        self.cache.close()
+        await super().aclose()
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import defaultdict, deque
+from typing import Any, AsyncIterator, Tuple
+
+from client.llm_client.cache import _to_jsonable, make_cache_key
+from client.llm_client.llm_client import BaseLLMClient
+from client.llm_client.streaming import LLMStream, response_chunks
+
+
+class CassetteMissError(LookupError):
+    """Raised when a replayed cassette has no response left for a request."""
+
+
+class CassetteLLMClient(BaseLLMClient):
+    """Records LLM request/response pairs to a JSONL cassette and replays them.
+
+    In ``record`` mode every call goes to ``inner`` and is appended to the
+    cassette as one line: ``{"key", "content", "choice", "latency", "ttft"}``,
+    where ``key`` is the canonical hash of the messages and per-call
+    parameters. In ``replay`` mode no network is used: identical requests get
+    their recorded responses back in recorded order.
+
+    Tool results often carry timestamps or ids that differ between runs, so a
+    request with no exact match falls back to the next unplayed entry in
+    recording order unless ``strict`` is set.
+
+    ``latency_scale`` injects the recorded latency multiplied by the scale
+    (1.0 reproduces the original timing); None replays instantly.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        inner: BaseLLMClient | None = None,
+        latency_scale: float | None = None,
+        strict: bool = False,
+    ) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("Recording a cassette needs an inner client.")
+        self.path = path
+        self.mode = mode
+        self.inner = inner
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.entries: list[dict[str, Any]] = []
+        self._by_key: dict[str, deque[int]] = defaultdict(deque)
+        self._played: set[int] = set()
+        self._next = 0
+        self._file = None
+        if mode == "replay":
+            self._load()
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+
+    @classmethod
+    def from_env(cls, inner: BaseLLMClient | None = None) -> "CassetteLLMClient":
+        """Build a cassette client from LLM_CASSETTE_* environment variables."""
+        scale = os.getenv("LLM_CASSETTE_LATENCY_SCALE")
+        return cls(
+            path=os.getenv("LLM_CASSETTE_PATH", "llm_cassette.jsonl"),
+            mode=os.getenv("LLM_CASSETTE_MODE", "replay"),
+            inner=inner,
+            latency_scale=float(scale) if scale else None,
+            strict=os.getenv("LLM_CASSETTE_STRICT", "false").lower() in ("1", "true", "yes"),
+        )
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self.entries.append(json.loads(line))
+        for index, entry in enumerate(self.entries):
+            self._by_key[entry["key"]].append(index)
+
+    @property
+    def model_id(self) -> str | None:
+        return getattr(self.inner, "model_id", None)
+
+    @property
+    def request_params(self) -> dict[str, Any]:
+        return getattr(self.inner, "request_params", {})
+
+    def cache_key(self, messages: list[dict[str, Any]], **kwargs: Any) -> str:
+        # Model and default params are left out so a replay needs no inner client
+        return make_cache_key(messages, None, kwargs)
+
+    async def get_response(self, messages: list[dict[str, str]], stream: bool = False, **kwargs: Any) -> Tuple[str, Any] | LLMStream:
+        key = self.cache_key(messages, **kwargs)
+        if self.mode == "replay":
+            return await self._replay(key, stream)
+
+        if stream:
+            llm_stream = await self.inner.get_response(messages, stream=True, **kwargs)
+            llm_stream.add_done_callback(
+                lambda done: self._record(key, done.content, done.choice, done.total_time, done.ttft)
+            )
+            return llm_stream
+        started = time.perf_counter()
+        content, choice = await self.inner.get_response(messages, **kwargs)
+        self._record(key, content, choice, time.perf_counter() - started, None)
+        return content, choice
+
+    def _record(self, key: str, content: str | None, choice: Any, latency: float, ttft: float | None) -> None:
+        if choice and not isinstance(choice, dict):
+            choice = choice.model_dump(exclude_none=True)
+        entry = {
+            "key": key,
+            "content": content,
+            "choice": choice or {},
+            "latency": round(latency, 4),
+            "ttft": round(ttft, 4) if ttft is not None else None,
+        }
+        self.entries.append(entry)
+        if self._file is None:
+            logging.warning(f"Cassette {self.path} is closed; not recording response {key[:12]}")
+            return
+        self._file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=_to_jsonable) + "\n")
+        self._file.flush()
+
+    def _take(self, key: str) -> dict[str, Any]:
+        indices = self._by_key.get(key)
+        while indices and indices[0] in self._played:
+            indices.popleft()
+        if indices:
+            index = indices.popleft()
+        elif self.strict:
+            raise CassetteMissError(f"No recorded response for request {key[:12]} in {self.path}")
+        else:
+            while self._next < len(self.entries) and self._next in self._played:
+                self._next += 1
+            if self._next >= len(self.entries):
+                raise CassetteMissError(f"Cassette {self.path} exhausted after {len(self.entries)} responses")
+            index = self._next
+            logging.debug(f"Cassette miss for {key[:12]}; replaying entry {index} in recording order")
+        self._played.add(index)
+        return self.entries[index]
+
+    def _delay(self, seconds: float | None) -> float:
+        if self.latency_scale is None or not seconds:
+            return 0.0
+        return seconds * self.latency_scale
+
+    async def _replay(self, key: str, stream: bool) -> Tuple[str, Any] | LLMStream:
+        entry = self._take(key)
+        # Replayed messages are appended to the caller's history; hand out copies
+        choice = json.loads(json.dumps(entry["choice"]))
+        if stream:
+            return LLMStream(self._delayed_chunks(entry, choice))
+        delay = self._delay(entry["latency"])
+        if delay:
+            await asyncio.sleep(delay)
+        return entry["content"], choice
+
+    async def _delayed_chunks(self, entry: dict[str, Any], choice: dict[str, Any]) -> AsyncIterator[Tuple[dict[str, Any], str | None]]:
+        first = self._delay(entry.get("ttft") or entry["latency"])
+        if first:
+            await asyncio.sleep(first)
+        async for chunk in response_chunks(entry["content"], choice):
+            yield chunk
+        rest = self._delay(entry["latency"]) - first
+        if rest > 0:
+            await asyncio.sleep(rest)
+
+    def stats(self) -> dict[str, Any]:
+        return {"mode": self.mode, "entries": len(self.entries), "played": len(self._played)}
+
+    async def aclose(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.inner is not None:
+            await self.inner.aclose()
@@ -0,0 +1,25 @@
+from typing import Any, Tuple
+
+from client.llm_client.cache import make_cache_key
+from client.llm_client.llm_client import BaseLLMClient, DelegatingLLMClient
+from client.llm_client.streaming import LLMStream
+from utils.singleflight import SingleFlight
+
+
+class CoalescingLLMClient(DelegatingLLMClient):
+    """Makes one upstream call for identical concurrent requests.
+
+    Requests are identified by the same canonical key as the response cache.
+    Streamed calls are passed through untouched, since a stream can only be
+    consumed once.
+    """
+
+    def __init__(self, inner: BaseLLMClient, singleflight: SingleFlight | None = None) -> None:
+        super().__init__(inner)
+        self.singleflight = singleflight or SingleFlight()
+
+    async def get_response(self, messages: list[dict[str, str]], stream: bool = False, **kwargs: Any) -> Tuple[str, Any] | LLMStream:
+        if stream:
+            return await self.inner.get_response(messages, stream=True, **kwargs)
+        key = make_cache_key(messages, self.model_id, {**self.request_params, **kwargs})
+        return await self.singleflight.do(key, lambda: self.inner.get_response(messages, **kwargs))
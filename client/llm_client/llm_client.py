@@ -1,14 +1,113 @@
 import os
 import httpx
 import logging
-import requests
 from dotenv import load_dotenv
-from openai import OpenAI
-from typing import Tuple
+import asyncio
+import openai
+from openai import AsyncOpenAI, AsyncStream
+from typing import Any, AsyncIterator, Tuple
+from openai.types.chat.chat_completion import ChatCompletion, Choice
+from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
+
+from client.llm_client.metrics import LLMCallRecorder
+from client.llm_client.rate_limit import (
+    RETRYABLE_STATUS_CODES,
+    THROTTLE_STATUS_CODES,
+    RetryDecision,
+    estimate_tokens,
+    get_rate_limiter,
+    parse_retry_after,
+    provider_name,
+)
+from client.llm_client.streaming import LLMStream
 import json
 
 load_dotenv()
 
+try:
+    import h2  # noqa: F401  # httpx only negotiates HTTP/2 when h2 is installed
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# One pooled AsyncClient per process so every LLMClient reuses the same
+# keep-alive connections (and TLS sessions) instead of reconnecting per call.
+_shared_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled httpx.AsyncClient, creating it on first use.
+
+    Pool sizes and timeouts can be tuned with LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS, LLM_KEEPALIVE_EXPIRY and LLM_TIMEOUT.
+
+    Returns:
+        The shared AsyncClient.
+    """
+    global _shared_http_client
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 20)),
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", 60)),
+        )
+        timeout = httpx.Timeout(float(os.getenv("LLM_TIMEOUT", 120)), connect=10.0)
+        _shared_http_client = httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE, limits=limits, timeout=timeout
+        )
+        logging.debug(f"Created shared LLM http client (http2={_HTTP2_AVAILABLE})")
+    return _shared_http_client
+
+
+async def close_http_client() -> None:
+    """Close the process-wide pooled httpx.AsyncClient if it is open."""
+    global _shared_http_client
+    # The AsyncOpenAI clients wrap the same pool, so drop them together.
+    _shared_openai_clients.clear()
+    if _shared_http_client is not None and not _shared_http_client.is_closed:
+        await _shared_http_client.aclose()
+    _shared_http_client = None
+
+
+_shared_openai_clients: dict[tuple[str, str], AsyncOpenAI] = {}
+_shared_llm_semaphore: asyncio.Semaphore | None = None
+
+
+def get_openai_client(api_key: str, base_url: str) -> AsyncOpenAI:
+    """Return the AsyncOpenAI client for (api_key, base_url), backed by the shared pool.
+
+    Retries are left to the caller, so max_retries is 0.
+
+    Args:
+        api_key: API key for the provider.
+        base_url: OpenAI-compatible base URL.
+
+    Returns:
+        A cached AsyncOpenAI instance.
+    """
+    key = (api_key, base_url)
+    client = _shared_openai_clients.get(key)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=get_http_client(),
+            max_retries=0,
+        )
+        _shared_openai_clients[key] = client
+    return client
+
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """Return the process-wide semaphore capping in-flight LLM requests.
+
+    The limit is read once from LLM_MAX_CONCURRENCY (default 16).
+    """
+    global _shared_llm_semaphore
+    if _shared_llm_semaphore is None:
+        _shared_llm_semaphore = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", 16)))
+    return _shared_llm_semaphore
+
 # TODO:模型调用需要改变，最好可以支持多种模型，最简单的就是OPENAI的模型调用，不会进行过多的可扩展性的计划
 # 下面的调用形式采用的是web的形式，实际上可以采用python的sdk的形式
 # from openai import OpenAI
@@ -24,42 +123,152 @@ load_dotenv()
 # )
 
 
+class LLMResponseError(RuntimeError):
+    """An LLM call failed but the client reported it as a (message, {}) response."""
+
+
 class BaseLLMClient:
 
-    def get_response(self, messages: list[dict[str, str]]) -> str:
+    # Default request parameters (temperature, max_tokens, ...) sent with every call
+    request_params: dict[str, Any] = {}
+
+    async def get_response(self, messages: list[dict[str, str]], stream: bool = False, **kwargs: Any) -> Tuple[str, dict[str, str]] | LLMStream:
         """Get a response from the LLM.
 
         Args:
             messages: A list of message dictionaries.
+            stream: Return an LLMStream of content deltas and incrementally
+                assembled tool_calls instead of the complete response.
+            **kwargs: Extra request parameters (e.g. tools, temperature)
+                overriding ``request_params`` for this call.
 
         Returns:
-            The LLM's response as a string.
+            The LLM's response content and the raw first choice, or an
+            LLMStream when ``stream`` is true.
 
         Raises:
             NotImplementedError: This method should be implemented by subclasses.
         """
         raise NotImplementedError("Subclasses must implement this method.")
 
+    async def get_responses(
+        self,
+        conversations: list[list[dict[str, str]]],
+        max_concurrency: int = 8,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> list[Tuple[str, Any] | BaseException]:
+        """Get responses for many independent conversations with bounded parallelism.
+
+        Args:
+            conversations: One message list per request.
+            max_concurrency: Maximum number of requests in flight at once.
+            timeout: Per-item timeout in seconds; None waits indefinitely.
+            **kwargs: Extra request parameters passed to every get_response call.
+
+        Returns:
+            One entry per conversation, in input order: the (content, choice)
+            tuple on success, or the exception (TimeoutError for timeouts)
+            for items that failed. An error response with an empty choice,
+            as LLMClient returns on HTTP failures, becomes an
+            LLMResponseError. One failure never aborts the batch.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def get_one(index: int, messages: list[dict[str, str]]) -> Tuple[str, Any] | BaseException:
+            async with semaphore:
+                try:
+                    content, choice = await asyncio.wait_for(self.get_response(messages, **kwargs), timeout)
+                    if not choice:
+                        raise LLMResponseError(content)
+                    return content, choice
+                except Exception as e:
+                    logging.warning(f"Batch item {index} failed: {e!r}")
+                    return e
+
+        return await asyncio.gather(*(get_one(i, messages) for i, messages in enumerate(conversations)))
+
+    async def aclose(self) -> None:
+        """Release any transport resources held by the client."""
+        return None
+
+
+class DelegatingLLMClient(BaseLLMClient):
+    """Base class for clients that add behaviour around another BaseLLMClient."""
+
+    def __init__(self, inner: BaseLLMClient) -> None:
+        self.inner = inner
+
+    @property
+    def model_id(self) -> str | None:
+        return getattr(self.inner, "model_id", None)
+
+    @property
+    def request_params(self) -> dict[str, Any]:
+        return getattr(self.inner, "request_params", {})
+
+    async def get_response(self, messages: list[dict[str, str]], stream: bool = False, **kwargs: Any) -> Tuple[str, dict[str, str]] | LLMStream:
+        return await self.inner.get_response(messages, stream=stream, **kwargs)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
 
 class LLMClient(BaseLLMClient):
-    """Manages communication with the LLM provider."""
+    """Manages communication with the LLM provider.
 
-    def __init__(self, api_key: str,model_id:str|None=os.getenv('MODEL_ID'),**kwargs) -> None:
+    Requests go through the shared pooled httpx.AsyncClient (see
+    get_http_client) unless a dedicated client is passed in, so several
+    sessions in one process can have LLM calls in flight at the same time.
+    """
+
+    def __init__(self, api_key: str,model_id:str|None=os.getenv('MODEL_ID'),http_client: httpx.AsyncClient | None = None,**kwargs) -> None:
         self.api_key = api_key
         self.model_id = model_id or os.getenv("MODEL_ID", "gemini-2.0-flash")
         if not self.api_key:
             raise ValueError("API key must be provided for LLMClient.")
         if not self.model_id:
             raise ValueError("Model ID must be provided for LLMClient.")
-
-    async def get_response(self, messages: list[dict[str, str]]) -> Tuple[str, dict[str, str]]:
+        # A client passed in by the caller is owned by this instance and closed
+        # in aclose(); the shared pool is closed with close_http_client().
+        self._http_client: httpx.AsyncClient | None = http_client
+        self.request_params: dict[str, Any] = {"temperature": 0.7, "max_tokens": 4096, "top_p": 1}
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """The AsyncClient used for requests."""
+        if self._http_client is not None:
+            return self._http_client
+        return get_http_client()
+
+    async def open(self) -> "LLMClient":
+        """Open the underlying connection pool ahead of the first request."""
+        _ = self.http_client
+        return self
+
+    async def aclose(self) -> None:
+        """Close the dedicated AsyncClient, if this instance owns one."""
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+
+    async def __aenter__(self) -> "LLMClient":
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+    async def get_response(self, messages: list[dict[str, str]], stream: bool = False, **kwargs: Any) -> Tuple[str, dict[str, str]] | LLMStream:
         """Get a response from the LLM.
 
         Args:
             messages: A list of message dictionaries.
+            stream: Stream the completion as server-sent events.
+            **kwargs: Extra payload fields overriding ``request_params``.
 
         Returns:
-            The LLM's response as a string.
+            The LLM's response as a string and the raw first choice, or an
+            LLMStream when ``stream`` is true. Transport errors are raised
+            while iterating the stream.
 
         Raises:
             httpx.RequestError: If the request to the LLM fails.
@@ -74,49 +283,39 @@ class LLMClient(BaseLLMClient):
         payload = {
             "messages": messages,
             "model": self.model_id,
-            "temperature": 0.7,
-            "max_tokens": 4096,
-            "top_p": 1,
-            "stream": False,
+            **self.request_params,
+            **kwargs,
+            "stream": stream,
             # "stop": None,
         }
 
+        limiter = get_rate_limiter(provider_name(url), self.model_id)
+        estimated = estimate_tokens(messages)
 
-        # time out
-        # try:
-        #     with httpx.Client() as client:
-        #         response = client.post(url, headers=headers, json=payload)
-        #         response.raise_for_status()
-        #         data = response.json()
-        #         return data["choices"][0]["message"]["content"]
-
-        # except httpx.RequestError as e:
-        #     error_message = f"Error getting LLM response: {str(e)}"
-        #     logging.error(error_message)
-
-        #     if isinstance(e, httpx.HTTPStatusError):
-        #         status_code = e.response.status_code
-        #         logging.error(f"Status code: {status_code}")
-        #         logging.error(f"Response details: {e.response.text}")
-
-        #     return (
-        #         f"I encountered an error: {error_message}. "
-        #         "Please try again or rephrase your request."
-        #     )
-
+        if stream:
+            # 流式响应默认不带 usage，需显式请求最后一个 usage chunk
+            payload.setdefault("stream_options", {"include_usage": True})
+            return LLMStream(self._stream_chunks(url, headers, payload, estimated))
 
+        recorder = LLMCallRecorder(self.model_id)
         try:
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            print(f"the type of response is {type(response)}")
-            data = response.json()
+            with recorder:
+                data = await limiter.call(
+                    lambda: self._post(url, headers, payload, recorder),
+                    self._classify_error,
+                    estimated_tokens=estimated,
+                    count_tokens=lambda data: (data.get("usage") or {}).get("total_tokens"),
+                    on_retry=recorder.on_retry,
+                )
+                usage = data.get("usage") or {}
+                recorder.set_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
             return data["choices"][0]["message"]["content"], data["choices"][0]
 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             error_message = f"Error getting LLM response: {str(e)}"
             logging.error(error_message)
 
-            if hasattr(e, 'response') and e.response is not None:
+            if isinstance(e, httpx.HTTPStatusError):
                 status_code = e.response.status_code
                 logging.error(f"Status code: {status_code}")
                 logging.error(f"Response details: {e.response.text}")
@@ -124,28 +323,176 @@ class LLMClient(BaseLLMClient):
             return (
                 f"I encountered an error: {error_message}. "
                 "Please try again or rephrase your request."
+            ), {}
+
+    @staticmethod
+    def _classify_error(e: BaseException) -> RetryDecision:
+        """Decide whether an httpx failure is worth retrying."""
+        if isinstance(e, httpx.HTTPStatusError):
+            status_code = e.response.status_code
+            return RetryDecision(
+                retryable=status_code in RETRYABLE_STATUS_CODES,
+                throttled=status_code in THROTTLE_STATUS_CODES,
+                retry_after=parse_retry_after(e.response.headers),
+            )
+        return RetryDecision(retryable=isinstance(e, httpx.TransportError))
+
+    async def _post(self, url: str, headers: dict[str, str], payload: dict[str, Any], recorder: LLMCallRecorder) -> dict[str, Any]:
+        """Make one completion request and return the decoded body."""
+        response = await self._open_stream(url, headers, payload)
+        recorder.mark_first_byte()
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+        return response.json()
+
+    async def _open_stream(self, url: str, headers: dict[str, str], payload: dict[str, Any]) -> httpx.Response:
+        """Send a streaming request and return the response once headers arrive."""
+        request = self.http_client.build_request("POST", url, headers=headers, json=payload)
+        response = await self.http_client.send(request, stream=True)
+        if response.is_error:
+            await response.aread()
+            await response.aclose()
+        response.raise_for_status()
+        return response
+
+    async def _stream_chunks(self, url: str, headers: dict[str, str], payload: dict[str, Any], estimated_tokens: int = 1) -> AsyncIterator[Tuple[dict[str, Any], str | None]]:
+        """Yield (delta, finish_reason) pairs from the server-sent event stream.
+
+        Opening the stream goes through the rate limiter, so throttled or
+        failed requests are retried before the first chunk is produced.
+        """
+        limiter = get_rate_limiter(provider_name(url), self.model_id)
+        with LLMCallRecorder(self.model_id) as recorder:
+            response = await limiter.call(
+                lambda: self._open_stream(url, headers, payload),
+                self._classify_error,
+                estimated_tokens=estimated_tokens,
+                on_retry=recorder.on_retry,
             )
+            try:
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if chunk.get("usage"):
+                        recorder.set_usage(chunk["usage"].get("prompt_tokens"), chunk["usage"].get("completion_tokens"))
+                    for choice in chunk.get("choices", [])[:1]:
+                        recorder.mark_first_byte()
+                        yield choice.get("delta") or {}, choice.get("finish_reason")
+            finally:
+                await response.aclose()
 
 
 class OpenAIClient(BaseLLMClient):
-    """Manages communication with the OpenAI API."""
+    """Manages communication with the OpenAI API.
 
-    def __init__(self, api_key: str, model_id: str =os.getenv("MODEL_ID","gemini-2.0-flash") , **kwargs) -> None:
+    All instances talking to the same endpoint share one AsyncOpenAI client
+    (and therefore one connection pool). In-flight requests are capped by a
+    semaphore, the process-wide one from get_llm_semaphore() by default, and
+    paced and retried by the provider/model RateLimiter.
+    """
+
+    def __init__(self, api_key: str, model_id: str =os.getenv("MODEL_ID","gemini-2.0-flash") , semaphore: asyncio.Semaphore | None = None, base_url: str | None = None, **kwargs) -> None:
         # print(f"the base url  is {os.getenv('GEMINI_BASE_URL', 'https://api.openai.com/v1')}")
-        self.client = OpenAI(api_key=api_key, base_url=os.getenv("GEMINI_BASE_URL", "https://api.openai.com/v1"))
+        self.api_key = api_key
+        self.base_url = base_url or os.getenv("GEMINI_BASE_URL", "https://api.openai.com/v1")
         self.model_id = model_id
+        self.semaphore = semaphore or get_llm_semaphore()
+        self.request_params: dict[str, Any] = {"max_tokens": 2000000}
+        self.limiter = get_rate_limiter(provider_name(self.base_url), self.model_id)
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The shared AsyncOpenAI client for this endpoint."""
+        return get_openai_client(self.api_key, self.base_url)
 
-    async def get_response(self, messages: list[dict[str, str]]) -> Tuple[str, dict[str, str]]:
+    async def get_response(self, messages: list[dict[str, str]], stream: bool = False, **kwargs: Any) -> Tuple[str, Choice] | LLMStream:
         """Get a response from the OpenAI API.
 
         Args:
             messages: A list of message dictionaries.
+            stream: Stream the completion chunk by chunk.
+            **kwargs: Extra request parameters overriding ``request_params``.
 
         Returns:
-            The OpenAI's response as a string.
+            The response content and the first Choice as returned by the SDK
+            (a pydantic model, not a dict), or an LLMStream when ``stream``
+            is true.
+        """
+        if stream:
+            return LLMStream(self._stream_chunks(messages, **kwargs))
+        with LLMCallRecorder(self.model_id) as recorder:
+
+            # 只在单次 HTTP 请求期间占用信号量，重试退避等待时不占槽位
+            async def attempt() -> ChatCompletion:
+                async with self.semaphore:
+                    return await self._create(recorder, messages=messages,model=self.model_id,stream=False,**{**self.request_params, **kwargs})
+
+            response = await self.limiter.call(
+                attempt,
+                self._classify_error,
+                estimated_tokens=estimate_tokens(messages),
+                count_tokens=lambda response: response.usage.total_tokens if response.usage else None,
+                on_retry=recorder.on_retry,
+            )
+            if response.usage:
+                recorder.set_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        choice = response.choices[0]
+        return choice.message.content, choice
+
+    @staticmethod
+    def _classify_error(e: BaseException) -> RetryDecision:
+        """Decide whether an OpenAI SDK failure is worth retrying."""
+        if isinstance(e, openai.APIStatusError):
+            return RetryDecision(
+                retryable=e.status_code in RETRYABLE_STATUS_CODES,
+                throttled=e.status_code in THROTTLE_STATUS_CODES,
+                retry_after=parse_retry_after(e.response.headers),
+            )
+        return RetryDecision(retryable=isinstance(e, openai.APIConnectionError))
+
+    async def _stream_chunks(self, messages: list[dict[str, str]], **kwargs: Any) -> AsyncIterator[Tuple[dict[str, Any], str | None]]:
+        """Yield (delta, finish_reason) pairs.
+
+        A semaphore slot is taken by each attempt to open the stream and,
+        once one succeeds, held until the stream ends; it is not held while
+        the limiter sleeps between retries.
         """
-        response = self.client.chat.completions.create(messages=messages,model=self.model_id,stream=False,max_tokens=2000000)
-        data=json.loads(response.json())
-        # print(f"the type of data is {type(data)}")
-        # print(f"the value of data is {data}")
-        return data["choices"][0]["message"]["content"], data["choices"][0]
\ No newline at end of file
+
+        async def open_stream() -> AsyncStream[ChatCompletionChunk]:
+            await self.semaphore.acquire()
+            try:
+                return await self.client.chat.completions.create(messages=messages,model=self.model_id,stream=True,**{"stream_options": {"include_usage": True}, **self.request_params, **kwargs})
+            except BaseException:
+                self.semaphore.release()
+                raise
+
+        with LLMCallRecorder(self.model_id) as recorder:
+            response = await self.limiter.call(
+                open_stream,
+                self._classify_error,
+                estimated_tokens=estimate_tokens(messages),
+                on_retry=recorder.on_retry,
+            )
+            try:
+                async for chunk in response:
+                    if chunk.usage:
+                        recorder.set_usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+                    if not chunk.choices:
+                        continue
+                    recorder.mark_first_byte()
+                    choice = chunk.choices[0]
+                    yield choice.delta.model_dump(exclude_none=True), choice.finish_reason
+            finally:
+                self.semaphore.release()
+
+    async def _create(self, recorder: LLMCallRecorder, **params: Any) -> ChatCompletion:
+        """Make one non-streamed completion request, noting when headers arrive."""
+        async with self.client.chat.completions.with_streaming_response.create(**params) as raw_response:
+            recorder.mark_first_byte()
+            return await raw_response.parse()
@@ -0,0 +1,239 @@
+import asyncio
+import bisect
+import contextvars
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536, 262144)
+
+# Name of the agent/session making LLM calls in the current task
+llm_caller: contextvars.ContextVar[str] = contextvars.ContextVar("llm_caller", default="unknown")
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate a quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower  # above the largest finite bucket
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class LLMCallStats:
+    """Histograms and counters for one (model_id, caller) pair."""
+
+    def __init__(self) -> None:
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.ttfb = Histogram(LATENCY_BUCKETS)
+        self.prompt_tokens = Histogram(TOKEN_BUCKETS)
+        self.completion_tokens = Histogram(TOKEN_BUCKETS)
+        self.outcomes: dict[str, int] = {}
+        self.retries = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "latency_seconds": self.latency.snapshot(),
+            "ttfb_seconds": self.ttfb.snapshot(),
+            "prompt_tokens": self.prompt_tokens.snapshot(),
+            "completion_tokens": self.completion_tokens.snapshot(),
+            "outcomes": dict(self.outcomes),
+            "retries": self.retries,
+        }
+
+
+class LLMMetrics:
+    """In-process registry of LLM call metrics grouped by model and caller."""
+
+    def __init__(self) -> None:
+        self._stats: dict[tuple[str, str], LLMCallStats] = {}
+
+    def record_call(
+        self,
+        model_id: str | None,
+        latency: float,
+        outcome: str,
+        ttfb: float | None = None,
+        prompt_tokens: int | None = None,
+        completion_tokens: int | None = None,
+        retries: int = 0,
+        caller: str | None = None,
+    ) -> None:
+        """Record one get_response call.
+
+        Args:
+            model_id: Model the call went to.
+            latency: Wall time of the whole call in seconds.
+            outcome: "ok", "error" or "cancelled".
+            ttfb: Time to first byte (or first token when streaming).
+            prompt_tokens: Prompt tokens from the response usage.
+            completion_tokens: Completion tokens from the response usage.
+            retries: Retries made by the rate limiter.
+            caller: Calling agent; defaults to the current llm_caller.
+        """
+        key = (model_id or "unknown", caller or llm_caller.get())
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = LLMCallStats()
+        stats.latency.observe(latency)
+        if ttfb is not None:
+            stats.ttfb.observe(ttfb)
+        if prompt_tokens is not None:
+            stats.prompt_tokens.observe(prompt_tokens)
+        if completion_tokens is not None:
+            stats.completion_tokens.observe(completion_tokens)
+        stats.outcomes[outcome] = stats.outcomes.get(outcome, 0) + 1
+        stats.retries += retries
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Current metrics as ``{model_id: {caller: {...}}}``."""
+        result: dict[str, dict[str, Any]] = {}
+        for (model_id, caller), stats in self._stats.items():
+            result.setdefault(model_id, {})[caller] = stats.snapshot()
+        return result
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+        histograms = (
+            ("llm_request_latency_seconds", "Wall time of LLM calls.", "latency"),
+            ("llm_time_to_first_byte_seconds", "Time to first byte or token of LLM calls.", "ttfb"),
+            ("llm_prompt_tokens", "Prompt tokens per LLM call.", "prompt_tokens"),
+            ("llm_completion_tokens", "Completion tokens per LLM call.", "completion_tokens"),
+        )
+        for name, help_text, attr in histograms:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (model_id, caller), stats in sorted(self._stats.items()):
+                histogram: Histogram = getattr(stats, attr)
+                labels = f'model="{_escape(model_id)}",caller="{_escape(caller)}"'
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets + (math.inf,), histogram.counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == math.inf else repr(float(bound))
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        lines.append("# HELP llm_requests_total LLM calls by outcome.")
+        lines.append("# TYPE llm_requests_total counter")
+        for (model_id, caller), stats in sorted(self._stats.items()):
+            for outcome, count in sorted(stats.outcomes.items()):
+                lines.append(
+                    f'llm_requests_total{{model="{_escape(model_id)}",caller="{_escape(caller)}",'
+                    f'outcome="{_escape(outcome)}"}} {count}'
+                )
+        lines.append("# HELP llm_retries_total Retries made for LLM calls.")
+        lines.append("# TYPE llm_retries_total counter")
+        for (model_id, caller), stats in sorted(self._stats.items()):
+            lines.append(f'llm_retries_total{{model="{_escape(model_id)}",caller="{_escape(caller)}"}} {stats.retries}')
+        return "\n".join(lines) + "\n"
+
+
+class LLMCallRecorder:
+    """Measures one get_response call and records it on exit.
+
+    Use as a context manager around the call; the outcome is "ok" on normal
+    exit, "cancelled" on cancellation and "error" on any other exception,
+    unless set explicitly (for clients that turn errors into replies).
+    """
+
+    def __init__(self, model_id: str | None, metrics: LLMMetrics | None = None) -> None:
+        self.model_id = model_id
+        self.metrics = metrics or llm_metrics
+        # Captured now: a stream may be finished from a different context
+        self.caller = llm_caller.get()
+        self.started = time.perf_counter()
+        self.ttfb: float | None = None
+        self.retries = 0
+        self.prompt_tokens: int | None = None
+        self.completion_tokens: int | None = None
+        self.outcome: str | None = None
+
+    def mark_first_byte(self) -> None:
+        if self.ttfb is None:
+            self.ttfb = time.perf_counter() - self.started
+
+    def on_retry(self, attempt: int) -> None:
+        self.retries = attempt
+        self.ttfb = None  # only the successful attempt's first byte counts
+
+    def set_usage(self, prompt_tokens: int | None, completion_tokens: int | None) -> None:
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    def __enter__(self) -> "LLMCallRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self.outcome is None:
+            if exc_type is None:
+                self.outcome = "ok"
+            elif issubclass(exc_type, (asyncio.CancelledError, GeneratorExit)):
+                self.outcome = "cancelled"
+            else:
+                self.outcome = "error"
+        self.metrics.record_call(
+            self.model_id,
+            time.perf_counter() - self.started,
+            self.outcome,
+            ttfb=self.ttfb,
+            prompt_tokens=self.prompt_tokens,
+            completion_tokens=self.completion_tokens,
+            retries=self.retries,
+            caller=self.caller,
+        )
+
+
+@contextmanager
+def caller_scope(name: str) -> Iterator[None]:
+    """Attribute LLM calls made inside the block to ``name``."""
+    token = llm_caller.set(name)
+    try:
+        yield
+    finally:
+        llm_caller.reset(token)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+llm_metrics = LLMMetrics()
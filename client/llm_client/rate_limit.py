@@ -0,0 +1,310 @@
+import asyncio
+import email.utils
+import json
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Mapping, TypeVar
+from urllib.parse import urlparse
+
+T = TypeVar("T")
+
+# Status codes worth retrying; 429/503 additionally shrink the concurrency window
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+def parse_retry_after(headers: Mapping[str, str] | None) -> float | None:
+    """Read the server's requested back-off from response headers.
+
+    Understands ``retry-after-ms``, ``retry-after`` in seconds and
+    ``retry-after`` as an HTTP date.
+
+    Returns:
+        Seconds to wait, or None if the headers carry no hint.
+    """
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(float(value) / 1000.0, 0.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0, retry_after: float | None = None) -> float:
+    """Exponential backoff with full jitter, never shorter than Retry-After.
+
+    Args:
+        attempt: Zero-based retry number.
+        base: Delay scale of the first retry in seconds.
+        cap: Upper bound of the exponential part.
+        retry_after: Server-requested delay, if any.
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        # Spread the herd a little past the server's hint
+        delay = retry_after + random.uniform(0, base * 0.2)
+    return delay
+
+
+def estimate_tokens(messages: list[dict[str, Any]]) -> int:
+    """Rough prompt size (about four characters per token) for budgeting."""
+    return max(1, len(json.dumps(messages, ensure_ascii=False, default=str)) // 4)
+
+
+@dataclass
+class RetryDecision:
+    """How the limiter should react to a failed call."""
+
+    retryable: bool
+    throttled: bool = False
+    retry_after: float | None = None
+
+
+class TokenBucket:
+    """Refilling token bucket for per-minute budgets.
+
+    ``rate_per_minute=None`` disables the bucket. Consumption can push the
+    balance negative (when actual usage exceeds the estimate), which simply
+    delays later callers until the debt is refilled.
+    """
+
+    def __init__(self, rate_per_minute: float | None, capacity: float | None = None) -> None:
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity or rate_per_minute or 0.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.rate_per_minute:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate_per_minute / 60.0)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        if not self.rate_per_minute:
+            return
+        # A request larger than the whole bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) * 60.0 / self.rate_per_minute)
+
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the fact."""
+        if self.rate_per_minute:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class AdaptiveConcurrencyLimit:
+    """AIMD concurrency window.
+
+    The limit grows by ``1/limit`` per success (about +1 per window of
+    successful calls) and halves on every throttle signal.
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 64) -> None:
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < max(int(self.limit), self.minimum))
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+
+    def on_throttle(self) -> None:
+        self.limit = max(float(self.minimum), self.limit / 2.0)
+
+
+class RateLimiter:
+    """Client-side governor for one provider/model pair.
+
+    Combines a requests/minute bucket, a tokens/minute bucket, an AIMD
+    concurrency window and a shared cool-down set from Retry-After, and
+    drives jittered exponential retries through ``call``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        initial_concurrency: int = 8,
+        max_concurrency: int = 64,
+        max_retries: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+    ) -> None:
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrencyLimit(initial=initial_concurrency, maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self.retries = 0
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int = 1) -> AsyncIterator[None]:
+        """Wait for budget and a concurrency slot, then hold the slot."""
+        wait = self.blocked_until - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        await self.requests.acquire(1)
+        await self.tokens.acquire(estimated_tokens)
+        await self.concurrency.acquire()
+        try:
+            yield
+        finally:
+            await self.concurrency.release()
+
+    def on_success(self, estimated_tokens: int, used_tokens: int | None) -> None:
+        self.concurrency.on_success()
+        if used_tokens is not None:
+            self.tokens.adjust(used_tokens - estimated_tokens)
+
+    def on_throttle(self, retry_after: float | None) -> None:
+        self.throttled += 1
+        self.concurrency.on_throttle()
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        classify_error: Callable[[BaseException], RetryDecision],
+        estimated_tokens: int = 1,
+        count_tokens: Callable[[T], int | None] | None = None,
+        on_retry: Callable[[int], None] | None = None,
+    ) -> T:
+        """Run ``fn`` under the limiter, retrying retryable failures.
+
+        Args:
+            fn: Zero-argument coroutine function making one attempt.
+            classify_error: Maps an exception to a RetryDecision.
+            estimated_tokens: Tokens reserved from the tokens/minute budget.
+            count_tokens: Extracts actual token usage from a result.
+            on_retry: Called with the retry number before each retry.
+
+        Returns:
+            The first successful result.
+
+        Raises:
+            The last exception once retries are exhausted or the error is
+            not retryable.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.slot(estimated_tokens):
+                    result = await fn()
+            except Exception as e:
+                decision = classify_error(e)
+                if decision.throttled:
+                    self.on_throttle(decision.retry_after)
+                if not decision.retryable or attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay, decision.retry_after)
+                attempt += 1
+                self.retries += 1
+                if on_retry is not None:
+                    on_retry(attempt)
+                logging.warning(
+                    f"LLM call to {self.name} failed ({e}); retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            self.on_success(estimated_tokens, count_tokens(result) if count_tokens else None)
+            return result
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "concurrency_limit": self.concurrency.limit,
+            "in_flight": self.concurrency.in_flight,
+            "throttled": self.throttled,
+            "retries": self.retries,
+        }
+
+
+_rate_limiters: dict[tuple[str, str], RateLimiter] = {}
+_rate_limit_overrides: dict[tuple[str, str], dict[str, Any]] = {}
+
+
+def provider_name(base_url: str) -> str:
+    """Provider key derived from an endpoint URL (its host name)."""
+    return urlparse(base_url).hostname or base_url
+
+
+def _env_number(name: str) -> float | None:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def configure_rate_limit(provider: str, model_id: str, **options: Any) -> None:
+    """Set budgets for one provider/model pair before its limiter is first used.
+
+    Options are RateLimiter keyword arguments (requests_per_minute,
+    tokens_per_minute, max_retries, ...).
+    """
+    _rate_limit_overrides[(provider, model_id)] = options
+    _rate_limiters.pop((provider, model_id), None)
+
+
+def get_rate_limiter(provider: str, model_id: str) -> RateLimiter:
+    """Return the shared RateLimiter for a provider/model pair.
+
+    Defaults come from LLM_RPM, LLM_TPM, LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY and LLM_MAX_CONCURRENCY;
+    configure_rate_limit() overrides them per pair.
+    """
+    key = (provider, model_id)
+    limiter = _rate_limiters.get(key)
+    if limiter is None:
+        max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+        options = {
+            "requests_per_minute": _env_number("LLM_RPM"),
+            "tokens_per_minute": _env_number("LLM_TPM"),
+            "initial_concurrency": max(1, max_concurrency // 2),
+            "max_concurrency": max_concurrency,
+            "max_retries": int(os.getenv("LLM_MAX_RETRIES", 4)),
+            "base_delay": float(os.getenv("LLM_RETRY_BASE_DELAY", 0.5)),
+            "max_delay": float(os.getenv("LLM_RETRY_MAX_DELAY", 30)),
+            **_rate_limit_overrides.get(key, {}),
+        }
+        limiter = RateLimiter(f"{provider}/{model_id}", **options)
+        _rate_limiters[key] = limiter
+    return limiter
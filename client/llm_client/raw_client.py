@@ -5,7 +5,7 @@ import os
 
 from client.config.config import Configuration
 from client.local_servers.client_server import StdioServer,StreamableHttpServer,SseServer
-from client.llm_client import BaseLLMClient,OpenAIClient, LLMClient
+from client.llm_client import BaseLLMClient,OpenAIClient, LLMClient, close_http_client
 from client.local_servers.client_server import BaseServer
 
 
@@ -58,18 +58,13 @@ class ChatSession:
                     tools = await server.list_tools()
                     if any(tool.name == tool_call["tool"] for tool in tools):
                         try:
+                            # Progress arrives while the tool runs, not with its result
                             result = await server.execute_tool(
-                                tool_call["tool"], tool_call["arguments"]
+                                tool_call["tool"],
+                                tool_call["arguments"],
+                                progress_callback=lambda update: logging.info(f"Progress: {update}"),
                             )
 
-                            if isinstance(result, dict) and "progress" in result:
-                                progress = result["progress"]
-                                total = result["total"]
-                                percentage = (progress / total) * 100
-                                logging.info(
-                                    f"Progress: {progress}/{total} ({percentage:.1f}%)"
-                                )
-
                             return f"Tool execution result: {result}"
                         except Exception as e:
                             error_msg = f"Error executing tool: {str(e)}"
@@ -132,7 +127,7 @@ class ChatSession:
 
                     messages.append({"role": "user", "content": user_input})
 
-                    llm_response = self.llm_client.get_response(messages)
+                    llm_response, _ = await self.llm_client.get_response(messages)
                     logging.info("\nAssistant: %s", llm_response)
 
                     result = await self.process_llm_response(llm_response)
@@ -141,7 +136,7 @@ class ChatSession:
                         messages.append({"role": "assistant", "content": llm_response})
                         messages.append({"role": "system", "content": result})
 
-                        final_response = self.llm_client.get_response(messages)
+                        final_response, _ = await self.llm_client.get_response(messages)
                         logging.info("\nFinal response: %s", final_response)
                         messages.append(
                             {"role": "assistant", "content": final_response}
@@ -185,7 +180,10 @@ async def main() -> None:
     llm_client = LLMClient(config.llm_api_key)
     # TODO:这个llm_client,已经没有必要继续存在了，需要进行重构
     chat_session = ChatSession(servers, llm_client)
-    await chat_session.start()
+    try:
+        await chat_session.start()
+    finally:
+        await close_http_client()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Tuple
+
+from client.llm_client.llm_client import BaseLLMClient, OpenAIClient
+from client.llm_client.streaming import LLMStream
+
+
+class EndpointStats:
+    """Rolling latency and error statistics for one endpoint."""
+
+    def __init__(self, name: str, window: int = 100, eject_after: int = 3, eject_seconds: float = 30.0) -> None:
+        self.name = name
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.in_flight = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.eject_after:
+                self.ejected_until = time.monotonic() + self.eject_seconds
+
+    def percentile(self, q: float) -> float | None:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def p50(self) -> float | None:
+        return self.percentile(0.50)
+
+    @property
+    def p95(self) -> float | None:
+        return self.percentile(0.95)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+    def healthy(self, max_error_rate: float) -> bool:
+        return time.monotonic() >= self.ejected_until and self.error_rate <= max_error_rate
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "p50": self.p50,
+            "p95": self.p95,
+            "error_rate": self.error_rate,
+            "samples": len(self.outcomes),
+            "in_flight": self.in_flight,
+            "ejected": time.monotonic() < self.ejected_until,
+        }
+
+
+class RouterLLMClient(BaseLLMClient):
+    """Routes each call to the fastest healthy endpoint, optionally hedging.
+
+    Endpoints are ranked by rolling p50 latency; endpoints without samples
+    rank first so they get measured. An endpoint is skipped while its error
+    rate exceeds ``max_error_rate`` or after ``eject_after`` consecutive
+    failures (for ``eject_seconds``). Failed calls fail over to the next
+    endpoint.
+
+    With ``hedge=True``, if the primary has not answered by its p95 latency a
+    duplicate request goes to the next endpoint; the first success wins and
+    the other request is cancelled.
+    """
+
+    def __init__(
+        self,
+        endpoints: list[BaseLLMClient],
+        hedge: bool = False,
+        hedge_min_samples: int = 20,
+        max_error_rate: float = 0.5,
+        window: int = 100,
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("RouterLLMClient needs at least one endpoint.")
+        self.endpoints = endpoints
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.max_error_rate = max_error_rate
+        self.stats: list[EndpointStats] = [
+            EndpointStats(self._endpoint_name(endpoint, i), window, eject_after, eject_seconds)
+            for i, endpoint in enumerate(endpoints)
+        ]
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @staticmethod
+    def _endpoint_name(endpoint: BaseLLMClient, index: int) -> str:
+        base_url = getattr(endpoint, "base_url", None)
+        model_id = getattr(endpoint, "model_id", None)
+        return f"{index}:{base_url or type(endpoint).__name__}/{model_id}"
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "RouterLLMClient":
+        """Build a router of OpenAIClients from a config dict.
+
+        Expected shape::
+
+            {"hedge": true, "endpoints": [
+                {"base_url": "...", "model_id": "...", "api_key_env": "GEMINI_API_KEY"}, ...]}
+        """
+        endpoints = [
+            OpenAIClient(
+                api_key=os.getenv(entry.get("api_key_env", "GEMINI_API_KEY"), ""),
+                model_id=entry["model_id"],
+                base_url=entry.get("base_url"),
+            )
+            for entry in config["endpoints"]
+        ]
+        options = {key: value for key, value in config.items() if key != "endpoints"}
+        return cls(endpoints, **options)
+
+    @property
+    def model_id(self) -> str | None:
+        return getattr(self.endpoints[0], "model_id", None)
+
+    def ranked(self) -> list[int]:
+        """Endpoint indices, healthy ones first, each group fastest first."""
+        def key(i: int) -> tuple[bool, float]:
+            stats = self.stats[i]
+            return (not stats.healthy(self.max_error_rate), stats.p50 or 0.0)
+        return sorted(range(len(self.endpoints)), key=key)
+
+    async def _call(self, index: int, messages: list[dict[str, str]], stream: bool, **kwargs: Any) -> Any:
+        stats = self.stats[index]
+        stats.in_flight += 1
+        started = time.perf_counter()
+        ok = False
+        tracked = False
+        try:
+            result = await self.endpoints[index].get_response(messages, stream=stream, **kwargs)
+            if stream:
+                # The request only runs while the caller iterates; record it when it ends
+                result.add_done_callback(lambda done: stats.record(done.total_time, True))
+                result.add_error_callback(lambda failed: stats.record(failed.total_time, False))
+                tracked = True
+                return result
+            # LLMClient reports failures as an error string with an empty choice
+            ok = bool(result[1])
+            return result
+        finally:
+            stats.in_flight -= 1
+            # Streams are recorded by their callbacks; cancelled hedges are not the endpoint's fault
+            if not tracked and (ok or not asyncio.current_task().cancelling()):
+                stats.record(time.perf_counter() - started, ok)
+
+    async def get_response(self, messages: list[dict[str, str]], stream: bool = False, **kwargs: Any) -> Tuple[str, Any] | LLMStream:
+        order = self.ranked()
+        if self.hedge and not stream and len(order) > 1:
+            return await self._hedged(order, messages, **kwargs)
+
+        last_result = None
+        last_error: Exception | None = None
+        for index in order:
+            try:
+                result = await self._call(index, messages, stream, **kwargs)
+            except Exception as e:
+                logging.warning(f"LLM endpoint {self.stats[index].name} failed: {e}; failing over")
+                last_error = e
+                continue
+            if stream or result[1]:
+                return result
+            last_result = result
+        if last_result is not None:
+            return last_result
+        raise last_error
+
+    async def _hedged(self, order: list[int], messages: list[dict[str, str]], **kwargs: Any) -> Tuple[str, Any]:
+        primary_stats = self.stats[order[0]]
+        deadline = primary_stats.p95 if len(primary_stats.latencies) >= self.hedge_min_samples else None
+        tasks: dict[asyncio.Task, int] = {}
+
+        def launch(index: int) -> None:
+            tasks[asyncio.ensure_future(self._call(index, messages, False, **kwargs))] = index
+
+        launch(order[0])
+        remaining = list(order[1:])
+        last_result = None
+        last_error: Exception | None = None
+        try:
+            while tasks:
+                timeout = deadline if remaining and len(tasks) == 1 and deadline is not None else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Primary is slower than its p95: fire the hedge
+                    self.hedged += 1
+                    launch(remaining.pop(0))
+                    continue
+                for task in done:
+                    index = tasks.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        logging.warning(f"LLM endpoint {self.stats[index].name} failed: {e}")
+                        continue
+                    if result[1]:
+                        if index != order[0]:
+                            self.hedge_wins += 1
+                        return result
+                    last_result = result
+                if not tasks and remaining:
+                    launch(remaining.pop(0))
+        finally:
+            for task in tasks:
+                task.cancel()
+        if last_result is not None:
+            return last_result
+        raise last_error
+
+    def snapshot(self) -> dict[str, Any]:
+        """Per-endpoint latency/error statistics and hedging counters."""
+        return {
+            "endpoints": {stats.name: stats.snapshot() for stats in self.stats},
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+    async def aclose(self) -> None:
+        for endpoint in self.endpoints:
+            await endpoint.aclose()
@@ -0,0 +1,220 @@
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Tuple
+
+
+def streaming_enabled() -> bool:
+    """Whether agents should stream LLM responses (LLM_STREAM env var)."""
+    return os.getenv("LLM_STREAM", "false").lower() in ("1", "true", "yes")
+
+
+@dataclass
+class StreamDelta:
+    """One increment of a streamed completion.
+
+    Attributes:
+        content: The new content text carried by this chunk (may be empty).
+        tool_calls: The tool calls assembled so far, in OpenAI message format.
+        finish_reason: Set on the last chunk of the choice.
+    """
+
+    content: str = ""
+    tool_calls: list[dict[str, Any]] = field(default_factory=list)
+    finish_reason: str | None = None
+
+
+async def response_chunks(content: str | None, choice: Any) -> AsyncIterator[Tuple[dict[str, Any], str | None]]:
+    """Yield a complete response as a single LLMStream source chunk."""
+    if not isinstance(choice, dict):
+        choice = choice.model_dump(exclude_none=True) if choice is not None else {}
+    message = choice.get("message") or {}
+    delta = {"content": content, "tool_calls": [
+        {**tool_call, "index": i} for i, tool_call in enumerate(message.get("tool_calls") or [])
+    ]}
+    yield delta, choice.get("finish_reason")
+
+
+class LLMStream:
+    """Async iterator over a streamed chat completion.
+
+    Wraps a source of raw OpenAI-style chunk deltas
+    (``{"content": ..., "tool_calls": [...]}``, finish_reason) and yields
+    StreamDelta objects, assembling the partial ``tool_calls`` fragments by
+    index as they arrive. Once exhausted, ``content`` and ``choice`` hold the
+    full response in the same shape the non-streaming ``get_response``
+    returns, ``ttft`` the time to first token and ``total_time`` the time
+    until the last chunk in seconds. Both count only the time spent waiting
+    for the source, not the caller's work between chunks. If the source
+    raises, ``error`` holds the exception.
+    """
+
+    def __init__(self, source: AsyncIterator[Tuple[dict[str, Any], str | None]]) -> None:
+        self._source = source
+        self.started_at: float = time.perf_counter()
+        self.ttft: float | None = None
+        self.total_time: float | None = None
+        self._waited = 0.0
+        self.finish_reason: str | None = None
+        self.error: Exception | None = None
+        self._content_parts: list[str] = []
+        self._tool_calls: dict[int, dict[str, Any]] = {}
+        self._done = False
+        self._done_callbacks: list[Callable[["LLMStream"], None]] = []
+        self._error_callbacks: list[Callable[["LLMStream"], None]] = []
+
+    @classmethod
+    def from_response(cls, content: str | None, choice: Any) -> "LLMStream":
+        """Build a single-chunk stream from a complete, non-streamed response."""
+        return cls(response_chunks(content, choice))
+
+    @property
+    def content(self) -> str:
+        return "".join(self._content_parts)
+
+    @property
+    def tool_calls(self) -> list[dict[str, Any]]:
+        return [self._tool_calls[i] for i in sorted(self._tool_calls)]
+
+    @property
+    def choice(self) -> dict[str, Any]:
+        """The assembled first choice, shaped like a non-streamed response."""
+        message: dict[str, Any] = {"role": "assistant", "content": self.content or None}
+        if self._tool_calls:
+            message["tool_calls"] = self.tool_calls
+        return {"index": 0, "message": message, "finish_reason": self.finish_reason}
+
+    def _merge_tool_calls(self, fragments: list[dict[str, Any]]) -> None:
+        for fragment in fragments:
+            index = fragment.get("index", len(self._tool_calls))
+            tool_call = self._tool_calls.setdefault(
+                index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}}
+            )
+            if fragment.get("id"):
+                tool_call["id"] = fragment["id"]
+            if fragment.get("type"):
+                tool_call["type"] = fragment["type"]
+            function = fragment.get("function") or {}
+            if function.get("name"):
+                tool_call["function"]["name"] += function["name"]
+            if function.get("arguments"):
+                tool_call["function"]["arguments"] += function["arguments"]
+
+    def __aiter__(self) -> "LLMStream":
+        return self
+
+    async def __anext__(self) -> StreamDelta:
+        if self._done:
+            raise StopAsyncIteration
+        waiting_since = time.perf_counter()
+        try:
+            delta, finish_reason = await self._source.__anext__()
+        except StopAsyncIteration:
+            self._done = True
+            self.total_time = self._waited + time.perf_counter() - waiting_since
+            for callback in self._done_callbacks:
+                callback(self)
+            raise
+        except Exception as e:
+            self._done = True
+            self.error = e
+            self.total_time = self._waited + time.perf_counter() - waiting_since
+            for callback in self._error_callbacks:
+                callback(self)
+            raise
+        finally:
+            self._waited += time.perf_counter() - waiting_since
+        text = delta.get("content") or ""
+        fragments = delta.get("tool_calls") or []
+        if self.ttft is None and (text or fragments):
+            self.ttft = self._waited
+        if text:
+            self._content_parts.append(text)
+        if fragments:
+            self._merge_tool_calls(fragments)
+        if finish_reason:
+            self.finish_reason = finish_reason
+        return StreamDelta(content=text, tool_calls=self.tool_calls, finish_reason=finish_reason)
+
+    def add_done_callback(self, callback: Callable[["LLMStream"], None]) -> None:
+        """Call ``callback(stream)`` once the stream has been fully consumed."""
+        self._done_callbacks.append(callback)
+
+    def add_error_callback(self, callback: Callable[["LLMStream"], None]) -> None:
+        """Call ``callback(stream)`` if iterating the stream raises; ``stream.error`` is set."""
+        self._error_callbacks.append(callback)
+
+    async def collect(self) -> Tuple[str, dict[str, Any]]:
+        """Drain the stream and return (content, choice) like get_response."""
+        async for _ in self:
+            pass
+        return self.content, self.choice
+
+    async def aclose(self) -> None:
+        """Stop the underlying request early."""
+        self._done = True
+        aclose = getattr(self._source, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+class JsonFieldStreamer:
+    """Incrementally extracts one top-level string field from streamed JSON text.
+
+    Used to show the ``content`` of a JSON-formatted reply to the user while
+    the rest of the object is still arriving.
+    """
+
+    def __init__(self, field_name: str = "content") -> None:
+        self._key = json.dumps(field_name)
+        self._buffer = ""
+        self._start: int | None = None
+        self._pos = 0
+        self.finished = False
+
+    def feed(self, text: str) -> str:
+        """Add streamed text and return any newly decodable characters of the field."""
+        self._buffer += text
+        if self.finished:
+            return ""
+        if self._start is None:
+            key_at = self._buffer.find(self._key)
+            if key_at < 0:
+                return ""
+            rest = self._buffer[key_at + len(self._key):]
+            stripped = rest.lstrip(" \t\r\n:")
+            if not stripped:
+                return ""
+            if not stripped.startswith('"'):
+                # Not a string value (e.g. null); nothing to stream.
+                self.finished = True
+                return ""
+            self._start = len(self._buffer) - len(stripped) + 1
+            self._pos = self._start
+
+        out = []
+        i = self._pos
+        while i < len(self._buffer):
+            char = self._buffer[i]
+            if char == '"':
+                self.finished = True
+                i += 1
+                break
+            if char == "\\":
+                width = 2
+                if self._buffer[i + 1:i + 2] == "u":
+                    width = 6
+                    code = self._buffer[i + 2:i + 6]
+                    if len(code) == 4 and 0xD800 <= int(code, 16) <= 0xDBFF:
+                        width = 12  # high surrogate: decode together with its pair
+                escape = self._buffer[i:i + width]
+                if len(escape) < width:
+                    break  # wait for the rest of the escape sequence
+                out.append(json.loads(f'"{escape}"'))
+                i += width
+                continue
+            out.append(char)
+            i += 1
+        self._pos = i
+        return "".join(out)
@@ -0,0 +1,109 @@
+import os
+import time
+from collections import deque
+from typing import Any
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a server whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Per-server circuit breaker over a rolling window of call outcomes.
+
+    closed: calls go through; once at least ``min_calls`` outcomes are in the
+        window and the failure rate reaches ``failure_rate_threshold`` the
+        circuit opens.
+    open: calls fail immediately with CircuitOpenError for ``open_seconds``.
+    half_open: up to ``half_open_max_calls`` probe calls go through; a probe
+        success closes the circuit, a probe failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        min_calls: int = 5,
+        window: int = 20,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+    ) -> None:
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_config(cls, name: str, config: dict[str, Any] | None = None) -> "CircuitBreaker":
+        """Build a breaker from a server's ``circuit_breaker`` config, defaulting to CIRCUIT_* env vars."""
+        config = config or {}
+        return cls(
+            name,
+            failure_rate_threshold=float(config.get("failure_rate_threshold", os.getenv("CIRCUIT_FAILURE_RATE", 0.5))),
+            min_calls=int(config.get("min_calls", os.getenv("CIRCUIT_MIN_CALLS", 5))),
+            window=int(config.get("window", os.getenv("CIRCUIT_WINDOW", 20))),
+            open_seconds=float(config.get("open_seconds", os.getenv("CIRCUIT_OPEN_SECONDS", 30))),
+            half_open_max_calls=int(config.get("half_open_max_calls", 1)),
+        )
+
+    @property
+    def failure_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+    def allow(self) -> None:
+        """Admit one call or raise CircuitOpenError."""
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(f"Server {self.name} is unavailable (circuit open, retry in {remaining:.1f}s)")
+            self.state = self.HALF_OPEN
+            self.half_open_calls = 0
+        if self.state == self.HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError(f"Server {self.name} is unavailable (circuit half-open, probe in flight)")
+            self.half_open_calls += 1
+
+    def release(self) -> None:
+        """Give back the slot of an admitted call that ended without an outcome (e.g. cancelled)."""
+        if self.state == self.HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def record_success(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self.state = self.CLOSED
+            self.outcomes.clear()
+        self.outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+        self.outcomes.append(False)
+        if len(self.outcomes) >= self.min_calls and self.failure_rate >= self.failure_rate_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "failure_rate": self.failure_rate,
+            "samples": len(self.outcomes),
+            "rejected": self.rejected,
+        }
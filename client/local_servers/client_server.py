@@ -1,28 +1,129 @@
 
 import asyncio
+import contextvars
+import json
 import logging
 import os
 import shutil
+import time
+from collections import OrderedDict
 from contextlib import AsyncExitStack
+from dataclasses import dataclass
 from datetime import timedelta
-from typing import Any
+from typing import Any, Awaitable, Callable
 
-from mcp import ClientSession, StdioServerParameters
+import anyio
+
+from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
 from mcp.client.streamable_http import streamablehttp_client
 from mcp.client.sse import sse_client
 
+from client.llm_client.rate_limit import backoff_delay
+from client.local_servers.circuit_breaker import CircuitBreaker
+from client.local_servers.proc_stats import child_pids
+from client.local_servers.tool_manifest import config_hash, get_tool_manifest
+from client.local_servers.tool_progress import ProgressCallback, ToolCallStream, mcp_progress_handler
+from utils.singleflight import SingleFlight
+
+
+# Errors meaning the session's transport is gone rather than the tool failing
+TRANSPORT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError)
+
+# Serializes stdio spawns so each server can tell which new child process is its own
+_stdio_spawn_lock = asyncio.Lock()
+
+
+class ToolTimeoutError(TimeoutError):
+    """A tool call did not answer within its timeout."""
+
+
+# Ids of the JSON-RPC requests sent while a tool call is running, see _call_on_session
+_sent_request_ids: contextvars.ContextVar[list[Any] | None] = contextvars.ContextVar("sent_request_ids", default=None)
+
+
+class RequestRecordingStream:
+    """Write stream of a ClientSession that notes the id of each request sent.
+
+    The id of an in-flight call is needed to cancel it, and ClientSession
+    does not expose it; the wrapper sees it on the outgoing message.
+    """
+
+    def __init__(self, stream: Any) -> None:
+        self._stream = stream
+
+    async def send(self, message: Any) -> None:
+        root = getattr(getattr(message, "message", None), "root", None)
+        sent = _sent_request_ids.get()
+        if sent is not None and isinstance(root, types.JSONRPCRequest):
+            sent.append(root.id)
+        await self._stream.send(message)
+
+    async def __aenter__(self) -> "RequestRecordingStream":
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> Any:
+        return await self._stream.__aexit__(*exc_info)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class ToolResultCache:
+    """Size-bounded LRU of tool results with a TTL per entry."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        # Bumped by clear(); results fetched before a clear are not stored
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Any, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.generation += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
 
 
 class Tool:
     """Represents a tool with its properties and formatting."""
 
     def __init__(
-        self, name: str, description: str, input_schema: dict[str, Any]
+        self, name: str, description: str, input_schema: dict[str, Any], annotations: Any | None = None
     ) -> None:
         self.name: str = name
         self.description: str = description
         self.input_schema: dict[str, Any] = input_schema
+        # MCP ToolAnnotations (readOnlyHint, idempotentHint, ...) if the server sent them
+        self.annotations: Any | None = annotations
+
+    @property
+    def idempotent(self) -> bool:
+        """Whether the server marks the tool as safe to call again with the same arguments."""
+        if self.annotations is None:
+            return False
+        return bool(self.annotations.readOnlyHint or self.annotations.idempotentHint)
 
     def format_for_llm(self) -> str:
         """Format tool information for LLM.
@@ -64,89 +165,449 @@ class BaseServer:
         self._cleanup_lock: asyncio.Lock = asyncio.Lock()
         self.exit_stack: AsyncExitStack = AsyncExitStack()
         self.server_type: str|None=None 
+        # Read-only tools whose identical concurrent calls share one request
+        self.coalesce_tools: set[str] = set(config.get("coalesce_tools", []))
+        self._singleflight: SingleFlight = SingleFlight()
+        # Tools that may be retried after a failure; read-only (coalesced) tools always may
+        self.idempotent_tools: set[str] = set(config.get("idempotent_tools", [])) | self.coalesce_tools
+        self.breaker: CircuitBreaker = CircuitBreaker.from_config(name, config.get("circuit_breaker"))
+        self.max_retry_delay: float = float(config.get("max_retry_delay", 10))
+        # Opt-in result cache for read-only tools: {"tool": ttl_seconds} or a list using cache_ttl
+        cache_tools = config.get("cache_tools", {})
+        if not isinstance(cache_tools, dict):
+            cache_tools = {tool: config.get("cache_ttl", 5) for tool in cache_tools}
+        self.cache_ttls: dict[str, float] = {tool: float(ttl) for tool, ttl in cache_tools.items()}
+        # Per-attempt deadlines in seconds: per-tool overrides, then the server default
+        self.tool_timeouts: dict[str, float] = {tool: float(t) for tool, t in config.get("tool_timeouts", {}).items()}
+        tool_timeout = config.get("tool_timeout", os.getenv("TOOL_TIMEOUT", 60))
+        self.tool_timeout: float | None = float(tool_timeout) if tool_timeout else None
+        # Opt-in: Python MCP servers up to 1.9.x crash on notifications/cancelled
+        self.send_cancellation: bool = str(
+            config.get("send_cancellation", os.getenv("MCP_SEND_CANCELLATION", "false"))
+        ).lower() in ("1", "true", "yes")
+        self.tool_cache: ToolResultCache = ToolResultCache(int(config.get("cache_max_entries", 256)))
+        self.idempotent_tools |= set(self.cache_ttls)
+        # Tools that mutate shared state; agents never run them concurrently
+        self.serial_tools: set[str] = set(config.get("serial_tools", []))
+        # Upper bound on tool calls in flight on this server
+        self._call_semaphore: asyncio.Semaphore = asyncio.Semaphore(config.get("max_concurrency", 8))
+        # Task owning the transport when connected through connect()
+        self._owner_task: asyncio.Task | None = None
+        self._stop_event: asyncio.Event | None = None
+        # Called with this server when a tool call hits a dead transport
+        self.reconnect_hook: Callable[["BaseServer"], Awaitable[None]] | None = None
+        # Tool catalog of the current session; dropped on list_changed or reconnect
+        self._tools_cache: list[Tool] | None = None
+        self.tools_version: int = 0
+        # Lazy servers list tools from the persisted manifest and connect on first tool call
+        self.lazy: bool = str(config.get("lazy", os.getenv("MCP_LAZY_CONNECT", "false"))).lower() in ("1", "true", "yes")
+        self.config_hash: str = config_hash(config)
+        self._connect_lock: asyncio.Lock = asyncio.Lock()
 
     async def initialize(self) -> None:
         """Initialize the server connection."""
         raise NotImplementedError("Subclasses should implement this method.")
 
+    def _create_session(self, read_stream: Any, write_stream: Any) -> ClientSession:
+        """Create a ClientSession that reports server notifications back to us."""
+        return ClientSession(read_stream, RequestRecordingStream(write_stream), message_handler=self._handle_message)
+
+    async def _on_connected(self, session: ClientSession) -> None:
+        """Adopt a freshly initialized session; its tool catalog may differ."""
+        self.session = session
+        self.invalidate_tools()
+
+    async def _handle_message(self, message: Any) -> None:
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ToolListChangedNotification):
+            logging.info(f"Tool list of server {self.name} changed")
+            self.invalidate_tools()
+
+    def invalidate_tools(self) -> None:
+        """Drop the cached tool catalog and bump ``tools_version``."""
+        self._tools_cache = None
+        self.tools_version += 1
+
     async def list_tools(self) -> list[Any]:
         """List available tools from the server.
 
+        The catalog is fetched once per session and cached until the server
+        sends notifications/tools/list_changed or the session is replaced;
+        ``tools_version`` changes whenever the cache is dropped, so callers
+        can memoize anything derived from the list.
+
+        Lazy servers without a session answer from the persisted manifest
+        and only connect when there is none.
+
         Returns:
             A list of available tools.
 
         Raises:
-            RuntimeError: If the server is not initialized.
+            RuntimeError: If the server is not initialized (and not lazy).
         """
         if not self.session:
-            raise RuntimeError(f"Server {self.name} not initialized")
+            if not self.lazy:
+                raise RuntimeError(f"Server {self.name} not initialized")
+            if self._tools_cache is None:
+                self._tools_cache = self.manifest_tools()
+            if self._tools_cache is not None:
+                return list(self._tools_cache)
+            await self.ensure_connected()  # nothing persisted yet
+
+        if self._tools_cache is None:
+            version = self.tools_version
+            # Concurrent first callers share a single tools/list request
+            tools = await self._singleflight.do(("tools/list", version), self._fetch_tools)
+            if version == self.tools_version:
+                self._tools_cache = tools
+            return list(tools)
+        return list(self._tools_cache)
 
+    async def _fetch_tools(self) -> list[Tool]:
         tools_response = await self.session.list_tools()
         tools = []
+        definitions = []
 
         for item in tools_response:
             if isinstance(item, tuple) and item[0] == "tools":
                 tools.extend(
-                    Tool(tool.name, tool.description, tool.inputSchema)
+                    Tool(tool.name, tool.description, tool.inputSchema, tool.annotations)
                     for tool in item[1]
                 )
+                definitions.extend(tool.model_dump(mode="json", exclude_none=True) for tool in item[1])
 
+        if self.lazy:
+            # Only lazy servers read the manifest back; others leave no file behind
+            get_tool_manifest().put(self.config_hash, self.name, definitions)
         return tools
 
+    @property
+    def deferrable(self) -> bool:
+        """Whether connecting can wait for the first tool call."""
+        return self.lazy and get_tool_manifest().get(self.config_hash) is not None
+
+    def manifest_tools(self) -> list[Tool] | None:
+        """Tools persisted for this exact config entry, or None."""
+        definitions = get_tool_manifest().get(self.config_hash)
+        if definitions is None:
+            return None
+        tools = []
+        for definition in definitions:
+            tool = types.Tool.model_validate(definition)
+            tools.append(Tool(tool.name, tool.description, tool.inputSchema, tool.annotations))
+        return tools
+
+    async def ensure_connected(self) -> None:
+        """Connect a lazy server on first use; concurrent callers share one connect."""
+        async with self._connect_lock:
+            if self.session is None:
+                logging.info(f"Connecting to server {self.name} on first use")
+                await self.connect(float(self.config.get("startup_timeout", os.getenv("SERVER_STARTUP_TIMEOUT", 30))))
+
     async def execute_tool(
         self,
         tool_name: str,
         arguments: dict[str, Any],
         retries: int = 2,
         delay: float = 1.0,
+        timeout: float | None = None,
+        progress_callback: ProgressCallback | None = None,
     ) -> Any:
         """Execute a tool with retry mechanism.
 
+        Results of tools listed in ``cache_tools`` are served from a per-server
+        TTL cache, which is cleared whenever a tool that is not known to be
+        idempotent runs on this server.
+
         Args:
             tool_name: Name of the tool to execute.
             arguments: Tool arguments.
-            retries: Number of retry attempts.
-            delay: Delay between retries in seconds.
+            retries: Maximum number of attempts for idempotent tools;
+                other tools are tried once.
+            delay: Base delay of the jittered exponential backoff in seconds.
+            timeout: Seconds to wait for each attempt; defaults to the tool's
+                entry in ``tool_timeouts``, then ``tool_timeout`` (TOOL_TIMEOUT).
+            progress_callback: Called with a ToolProgress for every progress
+                notification the server sends while the call runs. Cached
+                results and calls joining a coalesced call report none.
 
         Returns:
             Tool execution result.
 
         Raises:
-            RuntimeError: If server is not initialized.
+            RuntimeError: If server is not initialized (and not lazy).
+            CircuitOpenError: If the server is failing and calls are refused.
+            ToolTimeoutError: If the tool did not answer within the timeout.
             Exception: If tool execution fails after all retries.
         """
         if not self.session:
-            raise RuntimeError(f"Server {self.name} not initialized")
+            if not self.lazy:
+                raise RuntimeError(f"Server {self.name} not initialized")
+            await self.ensure_connected()
 
+        if timeout is None:
+            timeout = self.tool_timeouts.get(tool_name, self.tool_timeout)
+        key = (tool_name, json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str))
+        ttl = self.cache_ttls.get(tool_name)
+        if ttl is not None:
+            cached = self.tool_cache.get(key)
+            if cached is not None:
+                logging.info(f"Using cached result of {tool_name}")
+                return cached
+            generation = self.tool_cache.generation
+            result = await self._call_tool_deduplicated(
+                key, tool_name, arguments, retries, delay, timeout, progress_callback
+            )
+            if not getattr(result, "isError", False) and generation == self.tool_cache.generation:
+                self.tool_cache.set(key, result, ttl)
+            return result
+
+        if self.is_retry_safe(tool_name):
+            return await self._call_tool_deduplicated(
+                key, tool_name, arguments, retries, delay, timeout, progress_callback
+            )
+        try:
+            return await self._call_tool_deduplicated(
+                key, tool_name, arguments, retries, delay, timeout, progress_callback
+            )
+        finally:
+            # A state-changing tool ran (or may have): cached reads are stale
+            self.tool_cache.clear()
+
+    def stream_tool(self, tool_name: str, arguments: dict[str, Any], **kwargs: Any) -> ToolCallStream:
+        """Start execute_tool in the background and iterate over its progress.
+
+        ``async for update in server.stream_tool(...)`` yields ToolProgress
+        updates; afterwards the stream's ``result`` holds the tool result.
+        ``await stream.aclose()`` cancels the call early. Keyword arguments
+        are passed on to execute_tool.
+        """
+        return ToolCallStream(
+            tool_name,
+            lambda on_progress: self.execute_tool(tool_name, arguments, progress_callback=on_progress, **kwargs),
+        )
+
+    async def _call_tool_deduplicated(
+        self,
+        key: tuple[str, str],
+        tool_name: str,
+        arguments: dict[str, Any],
+        retries: int,
+        delay: float,
+        timeout: float | None,
+        progress_callback: ProgressCallback | None,
+    ) -> Any:
+        if tool_name in self.coalesce_tools:
+            return await self._singleflight.do(
+                key,
+                lambda: self._call_tool_limited(tool_name, arguments, retries, delay, timeout, progress_callback),
+            )
+        return await self._call_tool_limited(tool_name, arguments, retries, delay, timeout, progress_callback)
+
+    async def _call_tool_limited(
+        self,
+        tool_name: str,
+        arguments: dict[str, Any],
+        retries: int,
+        delay: float,
+        timeout: float | None,
+        progress_callback: ProgressCallback | None,
+    ) -> Any:
+        async with self._call_semaphore:
+            return await self._call_tool_with_retries(tool_name, arguments, retries, delay, timeout, progress_callback)
+
+    def is_retry_safe(self, tool_name: str) -> bool:
+        """Whether a failed call of ``tool_name`` may be retried.
+
+        True for tools listed in ``idempotent_tools`` / ``coalesce_tools``
+        and for tools the server annotates as read-only or idempotent.
+        """
+        if tool_name in self.idempotent_tools:
+            return True
+        for tool in self._tools_cache or []:
+            if tool.name == tool_name:
+                return tool.idempotent
+        return False
+
+    async def _call_tool_with_retries(
+        self,
+        tool_name: str,
+        arguments: dict[str, Any],
+        retries: int,
+        delay: float,
+        timeout: float | None,
+        progress_callback: ProgressCallback | None,
+    ) -> Any:
+        """Call the tool on the session, retrying failed attempts of safe tools.
+
+        Calls are refused with CircuitOpenError while the server's circuit is
+        open. Retries back off exponentially with full jitter, starting at
+        ``delay`` seconds.
+        """
+        retry_safe = self.is_retry_safe(tool_name)
         attempt = 0
-        while attempt < retries:
+        while True:
+            self.breaker.allow()
             try:
                 logging.info(f"Executing {tool_name}...")
-                result = await self.session.call_tool(tool_name, arguments)
-
-                return result
-
+                result = await self._send_tool_call(tool_name, arguments, timeout, progress_callback)
+            except asyncio.CancelledError:
+                # Not the server's fault; a cancelled half-open probe must not hold its slot
+                self.breaker.release()
+                raise
             except Exception as e:
+                self.breaker.record_failure()
                 attempt += 1
                 logging.warning(
                     f"Error executing tool: {e}. Attempt {attempt} of {retries}."
                 )
-                if attempt < retries:
-                    logging.info(f"Retrying in {delay} seconds...")
-                    await asyncio.sleep(delay)
-                else:
+                if not retry_safe:
+                    logging.error(f"Tool {tool_name} is not marked idempotent; not retrying.")
+                    raise
+                if attempt >= retries:
                     logging.error("Max retries reached. Failing.")
                     raise
+                if self.reconnect_hook is not None and isinstance(e, TRANSPORT_ERRORS):
+                    await self.reconnect_hook(self)
+                wait = backoff_delay(attempt - 1, base=delay, cap=self.max_retry_delay)
+                logging.info(f"Retrying in {wait:.2f} seconds...")
+                await asyncio.sleep(wait)
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def _send_tool_call(
+        self,
+        tool_name: str,
+        arguments: dict[str, Any],
+        timeout: float | None,
+        progress_callback: ProgressCallback | None = None,
+    ) -> Any:
+        """Make one tools/call request."""
+        return await self._call_on_session(self.session, tool_name, arguments, timeout, progress_callback)
+
+    async def _call_on_session(
+        self,
+        session: ClientSession,
+        tool_name: str,
+        arguments: dict[str, Any],
+        timeout: float | None,
+        progress_callback: ProgressCallback | None = None,
+    ) -> Any:
+        """Call a tool on ``session``, cancelling it on the server if we stop waiting.
+
+        On timeout or cancellation of the calling task a
+        notifications/cancelled for the request is sent (unless
+        ``send_cancellation`` is off), so the server can stop working on a
+        result nobody will read. With a ``progress_callback`` the request
+        carries a progress token and the server's progress notifications
+        are passed on as they arrive.
+        """
+        # Filled by RequestRecordingStream when the tools/call request goes out
+        sent: list[Any] = []
+        token = _sent_request_ids.set(sent)
+        on_progress = mcp_progress_handler(tool_name, progress_callback) if progress_callback else None
+        call = session.call_tool(tool_name, arguments, progress_callback=on_progress)
+        try:
+            if timeout is None:
+                return await call
+            return await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError as e:
+            await asyncio.shield(self._send_cancel(session, sent, f"Timed out after {timeout}s"))
+            raise ToolTimeoutError(f"Tool {tool_name} on server {self.name} timed out after {timeout}s") from e
+        except asyncio.CancelledError:
+            await asyncio.shield(self._send_cancel(session, sent, "Client cancelled the request"))
+            raise
+        finally:
+            _sent_request_ids.reset(token)
+
+    async def _send_cancel(self, session: ClientSession, sent: list[Any], reason: str) -> None:
+        if not self.send_cancellation or not sent:
+            return  # disabled, or the request never left
+        request_id = sent[0]
+        try:
+            await asyncio.wait_for(
+                session.send_notification(
+                    types.ClientNotification(
+                        types.CancelledNotification(
+                            method="notifications/cancelled",
+                            params=types.CancelledNotificationParams(requestId=request_id, reason=reason),
+                        )
+                    )
+                ),
+                5,
+            )
+        except Exception as e:
+            logging.debug(f"Could not send cancellation for request {request_id} to {self.name}: {e}")
+
+    async def connect(self, timeout: float | None = None) -> None:
+        """Initialize the server in a dedicated task that owns the transport.
+
+        The stdio/HTTP transports are anyio task groups, which must be exited
+        by the task that entered them. Running initialize() in an owner task
+        lets servers be started concurrently and cleaned up from anywhere.
+
+        Args:
+            timeout: Seconds to wait for the session to come up; None waits
+                indefinitely.
+
+        Raises:
+            TimeoutError: If the server is not ready in time.
+            Exception: Whatever initialize() raised.
+        """
+        ready: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._stop_event = asyncio.Event()
+        self._owner_task = asyncio.create_task(self._own_connection(ready), name=f"mcp-server-{self.name}")
+        try:
+            await asyncio.wait_for(asyncio.shield(ready), timeout)
+        except BaseException:
+            await self.cleanup()
+            raise
+
+    async def _own_connection(self, ready: asyncio.Future[None]) -> None:
+        try:
+            await self.initialize()
+        except BaseException as e:
+            await self._close()
+            if not ready.done():
+                if isinstance(e, asyncio.CancelledError):
+                    ready.cancel()
+                else:
+                    ready.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return
+        ready.set_result(None)
+        try:
+            await self._stop_event.wait()
+        finally:
+            # Also when the transport's task group cancels us because the process died
+            await self._close()
 
     async def cleanup(self) -> None:
         """Clean up server resources."""
         async with self._cleanup_lock:
-            try:
-                await self.exit_stack.aclose()
-                self.session = None
-                self.stdio_context = None
-            except Exception as e:
-                logging.error(f"Error during cleanup of server {self.name}: {e}")
+            owner = self._owner_task
+            if owner is not None and owner is not asyncio.current_task():
+                # Let the owner task close the transport it entered
+                self._owner_task = None
+                self._stop_event.set()
+                if self.session is None:
+                    owner.cancel()  # still connecting
+                await asyncio.gather(owner, return_exceptions=True)
+                return
+            await self._close()
+
+    async def _close(self) -> None:
+        try:
+            await self.exit_stack.aclose()
+        except Exception as e:
+            logging.error(f"Error during cleanup of server {self.name}: {e}")
+        finally:
+            # A closed stack must not be reused by the next initialize()
+            self.exit_stack = AsyncExitStack()
+            self.session = None
+            self.invalidate_tools()
+            self.stdio_context = None
 
 # FIXME: can not initialize the execurot server,can not find mcp ，也就是启动的配置是错误的
 class StdioServer(BaseServer):
@@ -156,6 +617,10 @@ class StdioServer(BaseServer):
         super().__init__(name, config)
         self.stdio_context: Any | None = None
         self.server_type = "stdio"
+        # Look up the spawned process's pid (set by the stdio pool, which tracks its memory)
+        self.track_pid = False
+        # Pid of the spawned server process (None if untracked or /proc is unavailable)
+        self.pid: int | None = None
         
 
     async def initialize(self) -> None:
@@ -177,15 +642,23 @@ class StdioServer(BaseServer):
             cwd=self.config["cwd"],
         )
         try:
-            stdio_transport = await self.exit_stack.enter_async_context(
-                stdio_client(server_params)
-            )
+            if self.track_pid:
+                async with _stdio_spawn_lock:
+                    before = await asyncio.to_thread(child_pids)
+                    stdio_transport = await self.exit_stack.enter_async_context(
+                        stdio_client(server_params)
+                    )
+                    self.pid = min(await asyncio.to_thread(child_pids) - before, default=None)
+            else:
+                stdio_transport = await self.exit_stack.enter_async_context(
+                    stdio_client(server_params)
+                )
             read, write = stdio_transport
             session = await self.exit_stack.enter_async_context(
-                ClientSession(read, write)
+                self._create_session(read, write)
             )
             await session.initialize()
-            self.session = session
+            await self._on_connected(session)
         except Exception as e:
             logging.error(f"Error initializing server {self.name}: {e}")
             await self.cleanup()
@@ -238,10 +711,10 @@ class StreamableHttpServer(BaseServer):
             
             # 创建会话并初始化
             session = await self.exit_stack.enter_async_context(
-                ClientSession(read_stream, write_stream)
+                self._create_session(read_stream, write_stream)
             )
             await session.initialize()
-            self.session = session
+            await self._on_connected(session)
             
             # 记录session ID（如果可用）
             if get_session_id:
@@ -254,6 +727,96 @@ class StreamableHttpServer(BaseServer):
             await self.cleanup()
             raise
 
+class PooledStreamableHttpServer(BaseServer):
+    """StreamableHTTP server backed by a pool of ``pool_size`` sessions.
+
+    Each tool call goes to the session with the fewest requests in flight,
+    so one slow call does not hold up the others the way a single session
+    does. The pool presents itself as one server: the tool catalog comes
+    from the first session and list_changed from any session invalidates it.
+    A session whose transport dies is reconnected on its own.
+    """
+
+    def __init__(self, name: str, config: dict[str, Any]) -> None:
+        super().__init__(name, config)
+        self.server_type = "streamable-http"
+        self.pool_size: int = max(1, int(config.get("pool_size", 4)))
+        self.members: list[StreamableHttpServer] = []
+        self.outstanding: list[int] = []
+        self._next_member = 0
+        self._call_semaphore = asyncio.Semaphore(config.get("max_concurrency", 8 * self.pool_size))
+
+    async def initialize(self) -> None:
+        """Open all pool sessions concurrently."""
+        self.members = [StreamableHttpServer(f"{self.name}#{i}", self.config) for i in range(self.pool_size)]
+        self.outstanding = [0] * self.pool_size
+        for member in self.members:
+            # Forward list_changed from any session to the pool
+            member._handle_message = self._handle_message
+        timeout = float(self.config.get("startup_timeout", os.getenv("SERVER_STARTUP_TIMEOUT", 30)))
+        try:
+            # connect() gives every session its own owner task, so they can be closed from here
+            await asyncio.gather(*(member.connect(timeout) for member in self.members))
+        except BaseException as e:
+            logging.error(f"Error initializing pooled StreamableHttp server {self.name}: {e}")
+            await self._close()
+            raise
+        await self._on_connected(self.members[0].session)
+        logging.info(f"Connected to StreamableHTTP server {self.name} with {self.pool_size} sessions")
+
+    def _pick_member(self) -> int:
+        """Index of the live session with the fewest outstanding requests."""
+        live = [i for i, member in enumerate(self.members) if member.session is not None]
+        if not live:
+            raise RuntimeError(f"Server {self.name} has no live sessions")
+        # Rotate the starting point so ties are spread round-robin
+        start = self._next_member
+        self._next_member = (start + 1) % len(self.members)
+        live.sort(key=lambda i: (self.outstanding[i], (i - start) % len(self.members)))
+        return live[0]
+
+    async def _send_tool_call(
+        self,
+        tool_name: str,
+        arguments: dict[str, Any],
+        timeout: float | None,
+        progress_callback: ProgressCallback | None = None,
+    ) -> Any:
+        index = self._pick_member()
+        member = self.members[index]
+        self.outstanding[index] += 1
+        try:
+            return await self._call_on_session(member.session, tool_name, arguments, timeout, progress_callback)
+        except TRANSPORT_ERRORS as e:
+            await self._reconnect_member(index)
+            # Not a transport error any more: only this session needed replacing
+            raise RuntimeError(f"Session {member.name} lost its connection and was reconnected") from e
+        finally:
+            self.outstanding[index] -= 1
+
+    async def _reconnect_member(self, index: int) -> None:
+        member = self.members[index]
+        await member.cleanup()
+        try:
+            await member.connect(float(self.config.get("startup_timeout", 30)))
+        except Exception as e:
+            logging.error(f"Failed to reconnect session {member.name}: {e}")
+        if index == 0 or self.session is None:
+            self.session = next((m.session for m in self.members if m.session is not None), None)
+
+    def pool_stats(self) -> dict[str, Any]:
+        return {
+            member.name: {"connected": member.session is not None, "outstanding": self.outstanding[i]}
+            for i, member in enumerate(self.members)
+        }
+
+    async def _close(self) -> None:
+        for member in self.members:
+            await member.cleanup()
+        self.members = []
+        self.outstanding = []
+        await super()._close()
+
 class SseServer(BaseServer):
     """Manages MCP server connections over SSE transport."""
     def __init__(self, name: str, config: dict[str, Any]) -> None:
@@ -296,10 +859,10 @@ class SseServer(BaseServer):
 
             # 创建会话并初始化
             session = await self.exit_stack.enter_async_context(
-                ClientSession(read_stream, write_stream)
+                self._create_session(read_stream, write_stream)
             )
             await session.initialize()
-            self.session = session
+            await self._on_connected(session)
             
         except Exception as e:
             logging.error(f"Error initializing SSE server {self.name}: {e}")
@@ -307,6 +870,86 @@ class SseServer(BaseServer):
             raise
 
 
+@dataclass
+class ServerStartup:
+    """Startup outcome of one server."""
+
+    name: str
+    status: str  # "ok", "connected" (already up), "deferred" (lazy), "timeout" or "failed"
+    seconds: float
+    optional: bool = False
+    error: str | None = None
+
+
+async def start_servers(
+    servers: list[BaseServer],
+    timeout: float | None = None,
+    budget: float | None = None,
+) -> list[ServerStartup]:
+    """Connect all servers concurrently.
+
+    Each server gets ``startup_timeout`` from its config (default
+    ``timeout``, or SERVER_STARTUP_TIMEOUT), capped by what is left of the
+    overall ``budget`` (SERVER_STARTUP_BUDGET). Servers marked
+    ``"optional": true`` may fail without failing the startup. Servers that
+    already have a session are left alone, and lazy servers with a persisted
+    tool manifest are deferred until their first tool call.
+
+    Returns:
+        One ServerStartup per server, in input order; the breakdown is logged.
+
+    Raises:
+        RuntimeError: If a required server failed; every server started by
+            this call is cleaned up first.
+    """
+    if timeout is None:
+        timeout = float(os.getenv("SERVER_STARTUP_TIMEOUT", 30))
+    if budget is None and os.getenv("SERVER_STARTUP_BUDGET"):
+        budget = float(os.getenv("SERVER_STARTUP_BUDGET"))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + budget if budget is not None else None
+
+    async def start(server: BaseServer) -> ServerStartup:
+        optional = bool(server.config.get("optional", False))
+        if server.session is not None:
+            return ServerStartup(server.name, "connected", 0.0, optional)
+        if server.deferrable:
+            return ServerStartup(server.name, "deferred", 0.0, optional)
+        server_timeout = float(server.config.get("startup_timeout", timeout))
+        if deadline is not None:
+            server_timeout = max(0.0, min(server_timeout, deadline - loop.time()))
+        started = time.perf_counter()
+        try:
+            await server.connect(server_timeout)
+            return ServerStartup(server.name, "ok", time.perf_counter() - started, optional)
+        except (asyncio.TimeoutError, TimeoutError):
+            return ServerStartup(
+                server.name, "timeout", time.perf_counter() - started, optional, f"not ready after {server_timeout:.1f}s"
+            )
+        except Exception as e:
+            return ServerStartup(server.name, "failed", time.perf_counter() - started, optional, str(e))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(start(server) for server in servers))
+    logging.info(f"Server startup took {time.perf_counter() - started:.2f}s:")
+    for result in results:
+        note = f" ({result.error})" if result.error else ""
+        flag = " [optional]" if result.optional else ""
+        logging.info(f"  {result.name}: {result.status} in {result.seconds:.2f}s{flag}{note}")
+
+    failed = [result for result in results if result.status in ("timeout", "failed")]
+    for result in failed:
+        if result.optional:
+            logging.warning(f"Optional server {result.name} unavailable: {result.error}")
+    required = [result.name for result in failed if not result.optional]
+    if required:
+        for server, result in zip(servers, results):
+            if result.status == "ok":
+                await server.cleanup()
+        raise RuntimeError(f"Required servers failed to start: {', '.join(required)}")
+    return results
+
+
 def create_server(name: str, config: dict[str, Any]) -> BaseServer:
     """Factory function to create appropriate server based on configuration.
     
@@ -325,6 +968,8 @@ def create_server(name: str, config: dict[str, Any]) -> BaseServer:
     if transport == "stdio":
         return StdioServer(name, config)
     elif transport == "streamable-http":
+        if config.get("pool_size", 1) > 1:
+            return PooledStreamableHttpServer(name, config)
         return StreamableHttpServer(name, config)
     elif transport == "sse":
         return SseServer(name, config)
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import os
+from typing import Any
+
+from client.local_servers.client_server import BaseServer, ServerStartup, start_servers
+
+
+class ConnectionManager:
+    """Process-wide owner of MCP server connections.
+
+    Servers are connected once and kept warm across requests instead of
+    being initialized and cleaned up around every agent call. A background
+    task pings every connected session each ``ping_interval`` seconds and
+    reconnects servers whose ping fails or times out; tool calls that fail
+    with a transport error trigger the same reconnect before their retry.
+    Servers without a session (never connected, or cleaned up elsewhere)
+    are reconnected lazily by ``ensure``; lazy servers with a persisted tool
+    manifest connect themselves on their first tool call.
+    """
+
+    def __init__(
+        self,
+        ping_interval: float = 30.0,
+        ping_timeout: float = 10.0,
+        connect_timeout: float | None = None,
+        reconnect_attempts: int = 3,
+        reconnect_delay: float = 1.0,
+    ) -> None:
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.connect_timeout = connect_timeout
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnect_delay = reconnect_delay
+        self.servers: dict[str, BaseServer] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._health_task: asyncio.Task | None = None
+        self.reconnects = 0
+        self.ping_failures = 0
+
+    @classmethod
+    def from_env(cls) -> "ConnectionManager":
+        """Build a manager from MCP_PING_INTERVAL / MCP_PING_TIMEOUT / MCP_RECONNECT_ATTEMPTS."""
+        return cls(
+            ping_interval=float(os.getenv("MCP_PING_INTERVAL", 30)),
+            ping_timeout=float(os.getenv("MCP_PING_TIMEOUT", 10)),
+            reconnect_attempts=int(os.getenv("MCP_RECONNECT_ATTEMPTS", 3)),
+        )
+
+    def manages(self, server: BaseServer) -> bool:
+        return self.servers.get(server.name) is server
+
+    def register(self, server: BaseServer) -> None:
+        self.servers[server.name] = server
+        self._locks.setdefault(server.name, asyncio.Lock())
+        server.reconnect_hook = self.reconnect
+
+    async def ensure(self, servers: list[BaseServer]) -> list[ServerStartup]:
+        """Register ``servers`` and connect those without a live session.
+
+        Already connected servers cost nothing, so agents can call this at
+        the start of every request.
+        """
+        for server in servers:
+            if not self.manages(server):
+                self.register(server)
+        self._start_health_task()
+        pending = [server for server in servers if server.session is None and not server.deferrable]
+        if not pending:
+            return [
+                ServerStartup(server.name, "connected" if server.session is not None else "deferred", 0.0)
+                for server in servers
+            ]
+        # Serialize with reconnects of the same servers
+        locks = [self._locks[server.name] for server in pending]
+        for lock in locks:
+            await lock.acquire()
+        try:
+            return await start_servers(servers, timeout=self.connect_timeout)
+        finally:
+            for lock in locks:
+                lock.release()
+
+    async def reconnect(self, server: BaseServer) -> None:
+        """Replace the server's session with a fresh one, retrying with backoff."""
+        lock = self._locks.setdefault(server.name, asyncio.Lock())
+        if lock.locked():
+            # Someone else is already reconnecting; wait for them instead
+            async with lock:
+                return
+        async with lock:
+            await server.cleanup()
+            for attempt in range(1, self.reconnect_attempts + 1):
+                try:
+                    await server.connect(self.connect_timeout or float(os.getenv("SERVER_STARTUP_TIMEOUT", 30)))
+                    self.reconnects += 1
+                    logging.info(f"Reconnected to server {server.name}")
+                    return
+                except Exception as e:
+                    logging.warning(
+                        f"Reconnect to server {server.name} failed ({e}); attempt {attempt}/{self.reconnect_attempts}"
+                    )
+                    if attempt < self.reconnect_attempts:
+                        await asyncio.sleep(self.reconnect_delay * (2 ** (attempt - 1)))
+            logging.error(f"Giving up reconnecting to server {server.name}")
+
+    async def ping(self, server: BaseServer) -> bool:
+        session = server.session
+        if session is None:
+            return False
+        try:
+            await asyncio.wait_for(session.send_ping(), self.ping_timeout)
+            return True
+        except Exception as e:
+            self.ping_failures += 1
+            logging.warning(f"Ping to server {server.name} failed: {e!r}")
+            return False
+
+    def _start_health_task(self) -> None:
+        if self.ping_interval > 0 and (self._health_task is None or self._health_task.done()):
+            self._health_task = asyncio.create_task(self._health_loop(), name="mcp-health-check")
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            connected = [server for server in self.servers.values() if server.session is not None]
+            results = await asyncio.gather(*(self.ping(server) for server in connected))
+            for server, alive in zip(connected, results):
+                if not alive and server.session is not None:
+                    await self.reconnect(server)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "servers": {name: server.session is not None for name, server in self.servers.items()},
+            "reconnects": self.reconnects,
+            "ping_failures": self.ping_failures,
+        }
+
+    async def aclose(self) -> None:
+        """Stop health checks and close every managed connection."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        for server in reversed(list(self.servers.values())):
+            server.reconnect_hook = None
+            await server.cleanup()
+        self.servers.clear()
+
+
+_connection_manager: ConnectionManager | None = None
+
+
+def get_connection_manager() -> ConnectionManager:
+    """Return the process-wide ConnectionManager, creating it on first use."""
+    global _connection_manager
+    if _connection_manager is None:
+        _connection_manager = ConnectionManager.from_env()
+    return _connection_manager
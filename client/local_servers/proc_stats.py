@@ -0,0 +1,54 @@
+import os
+
+# Process information read from /proc; on other platforms every helper
+# returns nothing and callers skip the memory checks.
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def process_table() -> dict[int, tuple[int, int]]:
+    """Map every visible pid to ``(parent pid, resident set size in bytes)``."""
+    table: dict[int, tuple[int, int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return table
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue  # exited while scanning
+        # The command name is in parentheses and may contain spaces
+        fields = stat[stat.rfind(b")") + 2:].split()
+        table[int(entry)] = (int(fields[1]), int(fields[21]) * _PAGE_SIZE)
+    return table
+
+
+def child_pids(pid: int | None = None) -> set[int]:
+    """Direct children of ``pid`` (default: this process)."""
+    pid = os.getpid() if pid is None else pid
+    return {child for child, (parent, _) in process_table().items() if parent == pid}
+
+
+def tree_rss(pid: int) -> int | None:
+    """Resident memory of ``pid`` and all its descendants, or None if it is gone.
+
+    Servers started through ``uvx``/``npx`` run as grandchildren of the
+    spawned launcher, so the whole tree is counted.
+    """
+    table = process_table()
+    if pid not in table:
+        return None
+    children: dict[int, list[int]] = {}
+    for child, (parent, _) in table.items():
+        children.setdefault(parent, []).append(child)
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += table[current][1]
+        stack.extend(children.get(current, ()))
+    return total
@@ -0,0 +1,279 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from client.local_servers.client_server import TRANSPORT_ERRORS, BaseServer, StdioServer
+from client.local_servers.proc_stats import tree_rss
+from client.local_servers.tool_progress import ProgressCallback
+
+
+def spec_key(config: dict[str, Any]) -> str:
+    """Identify the process a stdio config starts; equal keys are interchangeable."""
+    spec = {key: config.get(key) for key in ("command", "args", "env", "cwd")}
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+@dataclass
+class PooledProcess:
+    """A connected stdio server process owned by the pool."""
+
+    name: str
+    server: StdioServer
+    key: str
+    config: dict[str, Any]
+    uses: int = 0
+    in_flight: int = 0
+    baseline_rss: int | None = None
+    last_rss_check: float = 0.0
+    retire: bool = False
+    # Server the process is handed out to; None while it waits in the pool
+    owner: BaseServer | None = field(default=None, repr=False)
+
+
+class StdioProcessPool:
+    """Keeps initialized stdio server processes ready to hand out.
+
+    For every distinct server config (command, args, env, cwd) up to
+    ``warm_pool`` spare sessions are spawned and initialized in the
+    background, so taking one costs nothing instead of a ``uvx``/``npx``
+    cold start. Processes are recycled after ``recycle_after_uses`` tool
+    calls or once their memory grew by more than ``recycle_rss_growth_mb``
+    since startup; both are read from the server config, defaulting to the
+    STDIO_* env vars.
+
+    The pool is per process and the first acquire still spawns, so spares
+    only help hosts that open or reconnect sessions repeatedly over a long
+    run; a single-session CLI should leave ``warm_pool`` at 0.
+    """
+
+    def __init__(self, connect_timeout: float | None = None, rss_check_interval: float = 10.0) -> None:
+        self.connect_timeout = connect_timeout
+        self.rss_check_interval = rss_check_interval
+        self._spares: dict[str, deque[PooledProcess]] = {}
+        self._pending: dict[str, set[asyncio.Task]] = {}
+        self._spawned = 0
+        self.recycled = 0
+        self._closed = False
+
+    @staticmethod
+    def warm_size(config: dict[str, Any]) -> int:
+        return int(config.get("warm_pool", os.getenv("STDIO_WARM_POOL", 0)))
+
+    async def acquire(self, name: str, config: dict[str, Any], owner: BaseServer) -> PooledProcess:
+        """Hand out a connected process for ``config``, spawning one if none is ready."""
+        key = spec_key(config)
+        spares = self._spares.setdefault(key, deque())
+        while True:
+            while spares:
+                proc = spares.popleft()
+                if proc.server.session is not None:
+                    break
+                await self._discard(proc)
+            else:
+                pending = self._pending.get(key)
+                if pending:
+                    # A spare is already starting; it is ahead of a new spawn
+                    await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                proc = await self._spawn(name, key, config)
+            break
+        proc.owner = owner
+        self._refill(name, key, config)
+        return proc
+
+    async def release(self, proc: PooledProcess) -> None:
+        """Take back a process; it goes back to the spares or is recycled."""
+        if proc.owner is None:
+            return
+        proc.owner = None
+        spares = self._spares.setdefault(proc.key, deque())
+        if (
+            self._closed
+            or proc.retire
+            or proc.server.session is None
+            or self.needs_recycle(proc)
+            or len(spares) >= self.warm_size(proc.config)
+        ):
+            await self._discard(proc)
+            self._refill(proc.name, proc.key, proc.config)
+        else:
+            spares.append(proc)
+
+    def end_call(self, proc: PooledProcess) -> bool:
+        """Count a finished tool call; True if the process should be recycled."""
+        proc.in_flight -= 1
+        proc.uses += 1
+        if not proc.retire and self.needs_recycle(proc):
+            proc.retire = True
+        return proc.retire
+
+    def needs_recycle(self, proc: PooledProcess) -> bool:
+        max_uses = int(proc.config.get("recycle_after_uses", os.getenv("STDIO_RECYCLE_AFTER_USES", 500)))
+        if max_uses and proc.uses >= max_uses:
+            logging.info(f"Recycling stdio process {proc.server.name} after {proc.uses} uses")
+            return True
+        max_growth = float(proc.config.get("recycle_rss_growth_mb", os.getenv("STDIO_RECYCLE_RSS_GROWTH_MB", 512)))
+        now = time.monotonic()
+        if not max_growth or proc.baseline_rss is None or now - proc.last_rss_check < self.rss_check_interval:
+            return False
+        proc.last_rss_check = now
+        rss = tree_rss(proc.server.pid)
+        if rss is not None and rss - proc.baseline_rss > max_growth * 1024 * 1024:
+            logging.info(
+                f"Recycling stdio process {proc.server.name}: memory grew "
+                f"{(rss - proc.baseline_rss) / 1024 / 1024:.0f}MB since start"
+            )
+            return True
+        return False
+
+    async def _spawn(self, name: str, key: str, config: dict[str, Any]) -> PooledProcess:
+        self._spawned += 1
+        server = StdioServer(f"{name}@{self._spawned}", config)
+        server.track_pid = True
+        proc = PooledProcess(name, server, key, config)
+        # Sessions are created before they have an owner; route notifications at call time
+        server._handle_message = functools.partial(self._forward_message, proc)
+        timeout = self.connect_timeout or float(config.get("startup_timeout", os.getenv("SERVER_STARTUP_TIMEOUT", 30)))
+        await server.connect(timeout)
+        if server.pid is not None:
+            proc.baseline_rss = await asyncio.to_thread(tree_rss, server.pid)
+            proc.last_rss_check = time.monotonic()
+        return proc
+
+    async def _forward_message(self, proc: PooledProcess, message: Any) -> None:
+        if proc.owner is not None:
+            await proc.owner._handle_message(message)
+
+    def _refill(self, name: str, key: str, config: dict[str, Any]) -> None:
+        if self._closed:
+            return
+        pending = self._pending.setdefault(key, set())
+        missing = self.warm_size(config) - len(self._spares.get(key, ())) - len(pending)
+        for _ in range(missing):
+            task = asyncio.create_task(self._spawn_spare(name, key, config), name=f"stdio-warm-{name}")
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+    async def _spawn_spare(self, name: str, key: str, config: dict[str, Any]) -> None:
+        try:
+            proc = await self._spawn(name, key, config)
+        except Exception as e:
+            logging.warning(f"Could not start a warm stdio process for {name}: {e}")
+            return
+        if self._closed:
+            await proc.server.cleanup()
+            return
+        self._spares.setdefault(key, deque()).append(proc)
+
+    async def _discard(self, proc: PooledProcess) -> None:
+        self.recycled += 1
+        await proc.server.cleanup()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "spares": {key: len(spares) for key, spares in self._spares.items()},
+            "starting": {key: len(pending) for key, pending in self._pending.items()},
+            "spawned": self._spawned,
+            "recycled": self.recycled,
+        }
+
+    async def aclose(self) -> None:
+        """Stop refilling and close every spare process."""
+        self._closed = True
+        pending = [task for tasks in self._pending.values() for task in tasks]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for spares in self._spares.values():
+            while spares:
+                await spares.popleft().server.cleanup()
+
+
+class WarmStdioServer(BaseServer):
+    """Stdio server that runs on a process taken from the warm pool.
+
+    initialize() takes a ready process from the pool instead of spawning
+    one; cleanup() gives it back. When the pool asks for a process to be
+    recycled, a fresh one is swapped in once the calls still running on the
+    old process have finished.
+    """
+
+    def __init__(self, name: str, config: dict[str, Any], pool: StdioProcessPool | None = None) -> None:
+        super().__init__(name, config)
+        self.server_type = "stdio"
+        self.pool = pool or get_stdio_pool()
+        self.lease: PooledProcess | None = None
+        self._swap_task: asyncio.Task | None = None
+
+    async def initialize(self) -> None:
+        """Take a connected process from the pool."""
+        self.lease = await self.pool.acquire(self.name, self.config, self)
+        await self._on_connected(self.lease.server.session)
+
+    async def _send_tool_call(
+        self,
+        tool_name: str,
+        arguments: dict[str, Any],
+        timeout: float | None,
+        progress_callback: ProgressCallback | None = None,
+    ) -> Any:
+        lease = self.lease
+        if lease is None or lease.server.session is None:
+            raise RuntimeError(f"Server {self.name} not initialized")
+        lease.in_flight += 1
+        try:
+            return await self._call_on_session(lease.server.session, tool_name, arguments, timeout, progress_callback)
+        except TRANSPORT_ERRORS:
+            lease.retire = True  # never hand a dead process out again
+            raise
+        finally:
+            retire = self.pool.end_call(lease)
+            if lease is not self.lease:
+                # Swapped out while this call ran; the last call hands it back
+                if lease.in_flight == 0 and lease.owner is self:
+                    await self.pool.release(lease)
+            elif retire and (self._swap_task is None or self._swap_task.done()):
+                self._swap_task = asyncio.create_task(self._swap_lease(), name=f"stdio-swap-{self.name}")
+
+    async def _swap_lease(self) -> None:
+        old = self.lease
+        try:
+            new = await self.pool.acquire(self.name, self.config, self)
+        except Exception as e:
+            logging.error(f"Could not replace the process of server {self.name}: {e}")
+            return
+        if self.lease is not old:
+            await self.pool.release(new)  # closed or reconnected meanwhile
+            return
+        self.lease = new
+        await self._on_connected(new.server.session)
+        if old is not None and old.in_flight == 0:
+            await self.pool.release(old)
+
+    async def _close(self) -> None:
+        if self._swap_task is not None and self._swap_task is not asyncio.current_task():
+            self._swap_task.cancel()
+            await asyncio.gather(self._swap_task, return_exceptions=True)
+        self._swap_task = None
+        lease, self.lease = self.lease, None
+        if lease is not None:
+            await self.pool.release(lease)
+        await super()._close()
+
+
+_stdio_pool: StdioProcessPool | None = None
+
+
+def get_stdio_pool() -> StdioProcessPool:
+    """Return the process-wide StdioProcessPool, creating it on first use."""
+    global _stdio_pool
+    if _stdio_pool is None:
+        _stdio_pool = StdioProcessPool()
+    return _stdio_pool
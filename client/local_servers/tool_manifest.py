@@ -0,0 +1,70 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any
+
+
+def config_hash(config: dict[str, Any]) -> str:
+    """Hash of a server's config entry; a changed entry invalidates its manifest."""
+    return hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+class ToolManifest:
+    """Tool catalogs of MCP servers persisted in a JSON file.
+
+    Entries are keyed by the hash of the server's config entry and hold
+    the raw tool definitions (name, description, inputSchema, annotations),
+    so lazy servers can describe their tools without connecting. Only the
+    latest entry per server name is kept.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._entries: dict[str, dict[str, Any]] | None = None
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self._entries is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable tool manifest {self.path}: {e}")
+                self._entries = {}
+        return self._entries
+
+    def get(self, key: str) -> list[dict[str, Any]] | None:
+        """Tool definitions stored for config hash ``key``, or None."""
+        entry = self._load().get(key)
+        return entry["tools"] if entry else None
+
+    def put(self, key: str, name: str, tools: list[dict[str, Any]]) -> None:
+        """Store the catalog of server ``name`` under ``key`` if it changed."""
+        entries = self._load()
+        entry = entries.get(key)
+        if entry is not None and entry["tools"] == tools:
+            return
+        for stale in [k for k, e in entries.items() if e["name"] == name and k != key]:
+            del entries[stale]
+        entries[key] = {"name": name, "saved_at": time.time(), "tools": tools}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not write tool manifest {self.path}: {e}")
+
+
+_tool_manifest: ToolManifest | None = None
+
+
+def get_tool_manifest() -> ToolManifest:
+    """Return the process-wide manifest at TOOL_MANIFEST_PATH."""
+    global _tool_manifest
+    if _tool_manifest is None:
+        _tool_manifest = ToolManifest(os.getenv("TOOL_MANIFEST_PATH", ".mcp_tool_manifest.json"))
+    return _tool_manifest
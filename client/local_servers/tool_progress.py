@@ -0,0 +1,97 @@
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Coroutine
+
+from mcp.shared.session import ProgressFnT
+
+
+@dataclass
+class ToolProgress:
+    """One notifications/progress update of a running tool call."""
+
+    tool_name: str
+    progress: float
+    total: float | None = None
+    message: str | None = None
+
+    @property
+    def fraction(self) -> float | None:
+        """Progress in [0, 1] when the server reports a total."""
+        if not self.total:
+            return None
+        return min(1.0, self.progress / self.total)
+
+    def __str__(self) -> str:
+        done = f"{self.progress:g}/{self.total:g} ({self.fraction:.0%})" if self.fraction is not None else f"{self.progress:g}"
+        return f"{self.tool_name}: {done}" + (f" {self.message}" if self.message else "")
+
+
+# Called with every progress update; may be a plain function or a coroutine function
+ProgressCallback = Callable[[ToolProgress], Awaitable[None] | None]
+
+
+def mcp_progress_handler(tool_name: str, callback: ProgressCallback) -> ProgressFnT:
+    """Adapt ``callback`` to the ClientSession progress_callback signature.
+
+    The session runs the handler inside its receive loop, so errors are
+    logged instead of raised and the callback should return quickly.
+    """
+
+    async def on_progress(progress: float, total: float | None, message: str | None) -> None:
+        try:
+            result = callback(ToolProgress(tool_name, progress, total, message))
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logging.warning(f"Progress callback for {tool_name} failed: {e}")
+
+    return on_progress
+
+
+class ToolCallStream:
+    """Async iterator over the progress of a running tool call.
+
+    Yields ToolProgress updates while the call runs; once exhausted,
+    ``result`` holds the CallToolResult (the call's exception is raised
+    from the iteration instead). ``aclose`` cancels the call, which also
+    asks the server to stop.
+    """
+
+    def __init__(self, tool_name: str, start: Callable[[ProgressCallback], Coroutine[Any, Any, Any]]) -> None:
+        self.tool_name = tool_name
+        self.result: Any = None
+        self._updates: asyncio.Queue[ToolProgress] = asyncio.Queue()
+        self._task: asyncio.Task = asyncio.create_task(start(self._updates.put_nowait), name=f"tool-{tool_name}")
+
+    def __aiter__(self) -> "ToolCallStream":
+        return self
+
+    async def __anext__(self) -> ToolProgress:
+        if self._updates.empty() and not self._task.done():
+            getter = asyncio.ensure_future(self._updates.get())
+            try:
+                await asyncio.wait({getter, self._task}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                received = getter.done()
+                if not received:
+                    getter.cancel()
+            if received:
+                return getter.result()
+        if not self._updates.empty():
+            return self._updates.get_nowait()
+        self.result = self._task.result()
+        raise StopAsyncIteration
+
+    async def collect(self) -> Any:
+        """Drain the progress updates and return the tool result."""
+        async for _ in self:
+            pass
+        return self.result
+
+    async def aclose(self) -> None:
+        """Cancel the call if it is still running."""
+        if not self._task.done():
+            self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
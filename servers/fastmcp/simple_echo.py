@@ -2,6 +2,8 @@
 FastMCP Echo Server
 """
 
+import argparse
+
 from mcp.server.fastmcp import FastMCP
 
 # Create server
@@ -15,7 +17,12 @@ def echo(text: str) -> str:
 
 def main():
     """Run the MCP server"""
-    mcp.run()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transport", choices=["stdio", "sse", "streamable-http"], default="stdio")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on for SSE/StreamableHTTP")
+    args = parser.parse_args()
+    mcp.settings.port = args.port
+    mcp.run(transport=args.transport)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -12,10 +12,10 @@ SAMPLE_RESOURCES = {
 
 
 @click.command()
-@click.option("--port", default=8000, help="Port to listen on for SSE")
+@click.option("--port", default=8000, help="Port to listen on for SSE/StreamableHTTP")
 @click.option(
     "--transport",
-    type=click.Choice(["stdio", "sse"]),
+    type=click.Choice(["stdio", "sse", "streamable-http"]),
     default="stdio",
     help="Transport type",
 )
@@ -72,6 +72,32 @@ def main(port: int, transport: str) -> int:
 
         import uvicorn
 
+        uvicorn.run(starlette_app, host="127.0.0.1", port=port)
+    elif transport == "streamable-http":
+        import contextlib
+
+        from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+        from starlette.applications import Starlette
+        from starlette.routing import Mount
+
+        session_manager = StreamableHTTPSessionManager(app=app)
+
+        async def handle_streamable_http(scope, receive, send):
+            await session_manager.handle_request(scope, receive, send)
+
+        @contextlib.asynccontextmanager
+        async def lifespan(starlette_app):
+            async with session_manager.run():
+                yield
+
+        starlette_app = Starlette(
+            debug=True,
+            routes=[Mount("/mcp", app=handle_streamable_http)],
+            lifespan=lifespan,
+        )
+
+        import uvicorn
+
         uvicorn.run(starlette_app, host="127.0.0.1", port=port)
     else:
         from mcp.server.stdio import stdio_server
@@ -84,4 +110,8 @@ def main(port: int, transport: str) -> int:
 
         anyio.run(arun)
 
-    return 0
\ No newline at end of file
+    return 0
+
+
+if __name__ == "__main__":
+    main()
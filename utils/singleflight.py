@@ -0,0 +1,70 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls into one in-flight call.
+
+    While a call for ``key`` is running, further ``do(key, ...)`` calls wait
+    for it and receive the same result (or exception) instead of starting
+    their own. Once it finishes the key is forgotten, so later calls run
+    again; this is deduplication, not caching.
+
+    A waiter that is cancelled does not cancel the shared call unless it was
+    the last one waiting for it.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self._waiters: dict[Hashable, int] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn()`` for ``key``, or join the call already in flight.
+
+        Args:
+            key: Hashable identity of the request.
+            fn: Zero-argument coroutine function performing the real call.
+
+        Returns:
+            The result of the (shared) call.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self.shared += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters.get(key) == 1:
+                task.cancel()
+            raise
+        finally:
+            if key in self._waiters and self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved when every waiter has gone away
+            task.exception()
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._calls)
+
+    def stats(self) -> dict[str, Any]:
+        """Upstream calls made and calls answered by joining one in flight."""
+        return {"calls": self.calls, "shared": self.shared, "in_flight": self.in_flight()}